@@ -0,0 +1,182 @@
+// Client for the sharded search index built by `python -m kfchou.search_index`.
+//
+// Query words are tokenized and stemmed like the posts were, and each one is
+// matched as a prefix of the indexed terms, so results update while typing.
+// Only the term shards covering the query words and the docs shards of the
+// results on screen are fetched, and each is fetched once per page view.
+(function () {
+  // Keep in sync with kfchou/search_index.py.
+  var STOPWORDS = new Set((
+    'a an and are as at be but by can do for from has have how i if in into is it its ' +
+    'me my not of on or so than that the their then there these they this to was we ' +
+    'were what when which while who why will with you your').split(' '));
+  var MAX_RESULTS = 20;
+
+  function stem(word) {
+    if (word.length <= 3 || /^\d+$/.test(word)) return word;
+    if (word.endsWith('ies') && word.length > 4) {
+      word = word.slice(0, -3) + 'y';
+    } else if (word.endsWith('sses')) {
+      word = word.slice(0, -2);
+    } else if (word.endsWith('s') && !/(ss|us|is)$/.test(word)) {
+      word = word.slice(0, -1);
+    } else {
+      var suffixes = ['ing', 'ed', 'ly'];
+      for (var i = 0; i < suffixes.length; i++) {
+        var suffix = suffixes[i];
+        var base = word.slice(0, -suffix.length);
+        if (word.endsWith(suffix) && base.length >= 3 && /[aeiouy]/.test(base)) {
+          var last = base[base.length - 1];
+          if (suffix !== 'ly' && last === base[base.length - 2] && 'aeioulsz'.indexOf(last) < 0) {
+            base = base.slice(0, -1);
+          }
+          word = base;
+          break;
+        }
+      }
+    }
+    if (word.length > 4 && word.endsWith('e')) word = word.slice(0, -1);
+    return word;
+  }
+
+  function queryWords(text) {
+    return (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(function (word) {
+      return word.length > 1 && !STOPWORDS.has(word);
+    });
+  }
+
+  function SiteSearch(options) {
+    this.root = options.indexUrl.replace(/\/manifest\.json$/, '');
+    this.input = options.searchInput;
+    this.results = options.resultsContainer;
+    this.cache = {};
+    this.manifest = null;
+    this.query = 0;
+    var self = this;
+    var timer = null;
+    this.input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () { self.search(self.input.value); }, 100);
+    });
+  }
+
+  SiteSearch.prototype.fetchJson = function (path, version) {
+    var url = this.root + '/' + path + '?v=' + version;
+    if (!this.cache[url]) {
+      this.cache[url] = fetch(url).then(function (response) { return response.json(); });
+    }
+    return this.cache[url];
+  };
+
+  SiteSearch.prototype.loadManifest = function () {
+    if (!this.manifest) {
+      this.manifest = fetch(this.root + '/manifest.json', { cache: 'no-cache' })
+        .then(function (response) { return response.json(); });
+    }
+    return this.manifest;
+  };
+
+  // Shards that can hold terms starting with prefix: the one with the longest
+  // key that is a prefix of it, and every shard whose key extends it.
+  function shardKeys(terms, prefix) {
+    var keys = [];
+    var longest = null;
+    Object.keys(terms).forEach(function (key) {
+      if (key.length > prefix.length && key.startsWith(prefix)) keys.push(key);
+      if (prefix.startsWith(key) && (longest === null || key.length > longest.length)) longest = key;
+    });
+    if (longest !== null) keys.push(longest);
+    return keys;
+  }
+
+  // Post id -> whether a term matched the stemmed word exactly, for one query word.
+  SiteSearch.prototype.matchWord = function (manifest, word) {
+    var stemmed = stem(word);
+    var self = this;
+    var keys = shardKeys(manifest.terms, stemmed);
+    return Promise.all(keys.map(function (key) {
+      return self.fetchJson('terms/' + key + '.json', manifest.terms[key]);
+    })).then(function (shards) {
+      var matches = new Map();
+      shards.forEach(function (shard) {
+        Object.keys(shard).forEach(function (term) {
+          if (!term.startsWith(stemmed) && !term.startsWith(word)) return;
+          var exact = term === stemmed;
+          var id = 0;
+          shard[term].forEach(function (delta) {
+            id += delta;
+            matches.set(id, matches.get(id) || exact);
+          });
+        });
+      });
+      return matches;
+    });
+  };
+
+  SiteSearch.prototype.search = function (text) {
+    var query = ++this.query;
+    var words = queryWords(text);
+    var self = this;
+    if (!words.length) {
+      this.render([]);
+      return;
+    }
+    this.loadManifest().then(function (manifest) {
+      return Promise.all(words.map(function (word) { return self.matchWord(manifest, word); }))
+        .then(function (perWord) {
+          // every query word must match; rank exact matches first, then newer posts
+          var ranked = [];
+          perWord[0].forEach(function (_, id) {
+            var exact = 0;
+            for (var i = 0; i < perWord.length; i++) {
+              if (!perWord[i].has(id)) return;
+              if (perWord[i].get(id)) exact++;
+            }
+            ranked.push([exact, id]);
+          });
+          ranked.sort(function (a, b) { return b[0] - a[0] || b[1] - a[1]; });
+          var ids = ranked.slice(0, MAX_RESULTS).map(function (entry) { return entry[1]; });
+          return self.loadDocs(manifest, ids);
+        })
+        .then(function (docs) {
+          if (query === self.query) self.render(docs);
+        });
+    });
+  };
+
+  SiteSearch.prototype.loadDocs = function (manifest, ids) {
+    var self = this;
+    var perShard = manifest.docs_per_shard;
+    return Promise.all(ids.map(function (id) {
+      var shard = String(Math.floor(id / perShard));
+      return self.fetchJson('docs/' + shard + '.json', manifest.docs[shard]).then(function (docs) {
+        return docs[id % perShard];
+      });
+    }));
+  };
+
+  SiteSearch.prototype.render = function (docs) {
+    var results = this.results;
+    results.innerHTML = '';
+    docs.forEach(function (doc) {
+      if (!doc) return;
+      var item = document.createElement('li');
+      var entry = document.createElement('div');
+      entry.style.textAlign = 'left';
+      var link = document.createElement('a');
+      link.href = doc[1];
+      var title = document.createElement('h1');
+      title.style.textAlign = 'left';
+      title.textContent = doc[0];
+      link.appendChild(title);
+      var date = document.createElement('span');
+      date.textContent = doc[2];
+      entry.appendChild(link);
+      entry.appendChild(date);
+      item.appendChild(entry);
+      results.appendChild(item);
+    });
+  };
+
+  window.SiteSearch = SiteSearch;
+})();
@@ -1,80 +1,351 @@
-"""Script for generating raindrops.gif"""
+"""Script for generating raindrops.gif
+
+    python raindrops.py                      # animate 50 drops, as in the post
+    python raindrops.py --drops 20000        # same animation, many more drops
+    python raindrops.py --benchmark          # frames per second across drop counts
+    python raindrops.py --export raindrops.gif --frames 100 --workers 8
+                                             # render offline, without a window
+
+Exports are byte-for-byte reproducible: the same arguments produce the same file,
+whatever the number of workers.
+"""
+
+import argparse
+import copy
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
 
 from matplotlib.animation import FuncAnimation
-from matplotlib import animation
-
-# Fixing random state for reproducibility
-np.random.seed(19680801)
-
-# Get the "spring" color map
-spring_cmap = plt.get_cmap("spring")
-
-# Create new Figure and an Axes which fills it.
-fig = plt.figure(figsize=(18, 6))
-ax = fig.add_axes([0, 0, 1, 1], frameon=False)
-ax.set_xlim(0, 1), ax.set_xticks([])
-ax.set_ylim(0, 1), ax.set_yticks([])
-
-# Create rain data
-n_drops = 50
-rain_drops = np.zeros(n_drops, dtype=[('position', float, (2,)),
-                                      ('size',     float),
-                                      ('growth',   float),
-                                      ('color',    float, (4,))])
-
-# initialize the raindrop colors
-raindrop_colors = []
-random_indices = np.random.randint(0, 256, n_drops)  # 256 is the number of colors in the "spring" colormap
-for index in random_indices:
-    color = spring_cmap(index / 255)  # Normalize the index to [0, 1]
-    raindrop_colors.append(color)
-    
-rain_drops['color'] = raindrop_colors
-
-# Initialize the raindrops in random positions and with
-# random growth rates.
-rain_drops['position'] = np.random.uniform(0, 1, (n_drops, 2))
-rain_drops['growth'] = np.random.uniform(50, 200, n_drops)
-
-# Construct the scatter which we will update during animation
-# as the raindrops develop.
-scat = ax.scatter(
-    rain_drops['position'][:, 0], 
-    rain_drops['position'][:, 1],
-    s=rain_drops['size'], 
-    lw=0.5, 
-    edgecolors=rain_drops['color'],
-    facecolors='none'
-    )
-
-
-def update(frame_number):
-    # Get an index which we can use to re-spawn the oldest raindrop.
-    current_index = frame_number % n_drops
-
-    # Make all colors more transparent as time progresses.
-    rain_drops['color'][:, 3] -= 1.0/len(rain_drops)
-    rain_drops['color'][:, 3] = np.clip(rain_drops['color'][:, 3], 0, 1)
-
-    # Make all circles bigger.
-    rain_drops['size'] += rain_drops['growth']
-
-    # Pick a new position for oldest rain drop, resetting its size,
-    # color and growth factor.
-    rain_drops['position'][current_index] = np.random.uniform(0, 1, 2)
-    rain_drops['size'][current_index] = 5
-    rain_drops['color'][current_index,3] = 1 # reset alpha channel to 1
-    rain_drops['growth'][current_index] = np.random.uniform(50, 200)
-
-    # Update the scatter collection, with the new colors, sizes and positions.
-    scat.set_edgecolors(rain_drops['color'])
-    scat.set_sizes(rain_drops['size'])
-    scat.set_offsets(rain_drops['position'])
-
-
-# Construct the animation, using the update function as the animation director.
-ani = FuncAnimation(fig, update, interval=10, save_count=100)
-plt.show()
+from PIL import GifImagePlugin, Image
+
+
+class RainSimulation:
+    """
+    Raindrop simulation stored as a struct of arrays.
+
+    Every drop keeps its position, growth rate, color and the frame it was (re)born
+    in. Sizes and transparencies follow from a drop's age, so advancing a frame only
+    writes the slots of the drops that respawn; everything else is one vectorized
+    expression per attribute.
+
+    With `spawn_rate=1` and the default seed, the random draws happen in the same
+    order as the original script, which respawned the oldest drop once per frame.
+    Larger simulations can respawn several drops per frame; each drop then fades
+    out over n_drops / spawn_rate frames.
+    """
+
+    def __init__(self, n_drops=50, spawn_rate=1, seed=19680801, cmap='spring'):
+        self.n_drops = n_drops
+        self.spawn_rate = spawn_rate
+        self.frame = -1
+        # legacy RandomState, to reproduce the np.random.seed(...) draws of the original
+        self.random = np.random.RandomState(seed)
+
+        # initialize the raindrop colors with one colormap lookup
+        # 256 is the number of colors in the "spring" colormap
+        color_index = self.random.randint(0, 256, n_drops)
+        self.colors = plt.get_cmap(cmap)(color_index / 255)
+
+        # Initialize the raindrops in random positions and with random growth rates.
+        self.positions = self.random.uniform(0, 1, (n_drops, 2))
+        self.growth = self.random.uniform(50, 200, n_drops)
+
+        # Initial drops start at size 0; respawned drops start at size 5.
+        self.birth = np.full(n_drops, -1)
+        self.base_size = np.zeros(n_drops)
+
+    def step(self):
+        """Advance one frame, respawning the oldest drops; returns their slots."""
+        self.frame += 1
+        slots = (self.frame * self.spawn_rate + np.arange(self.spawn_rate)) % self.n_drops
+
+        self.positions[slots] = self.random.uniform(0, 1, (self.spawn_rate, 2))
+        self.growth[slots] = self.random.uniform(50, 200, self.spawn_rate)
+        self.birth[slots] = self.frame
+        self.base_size[slots] = 5
+        return slots
+
+    def sizes(self):
+        """Marker areas, growing linearly with age."""
+        return self.base_size + (self.frame - self.birth) * self.growth
+
+    def edgecolors(self):
+        """Colors with alpha fading linearly with age."""
+        age = self.frame - self.birth
+        colors = self.colors.copy()
+        colors[:, 3] = np.clip(1 - age * self.spawn_rate / self.n_drops, 0, 1)
+        return colors
+
+
+def make_figure(figsize=(18, 6), dpi=None):
+    """New Figure with an Axes which fills it."""
+    fig = plt.figure(figsize=figsize, dpi=dpi)
+    ax = fig.add_axes([0, 0, 1, 1], frameon=False)
+    ax.set_xlim(0, 1), ax.set_xticks([])
+    ax.set_ylim(0, 1), ax.set_yticks([])
+    return fig, ax
+
+
+def scatter_drops(sim, ax, animated=False):
+    """Scatter collection of the drops, as hollow rings of zero size."""
+    return ax.scatter(
+        sim.positions[:, 0],
+        sim.positions[:, 1],
+        s=np.zeros(sim.n_drops),
+        lw=0.5,
+        edgecolors=sim.colors,
+        facecolors='none',
+        animated=animated,
+        )
+
+
+def update_drops(sim, scat):
+    """Update the scatter collection, with the new colors, sizes and positions."""
+    scat.set_edgecolors(sim.edgecolors())
+    scat.set_sizes(sim.sizes())
+    scat.set_offsets(sim.positions)
+
+
+def animate(sim, fig, ax, interval=10, save_count=100, blit=True):
+    """Build a FuncAnimation that redraws only the raindrop collection when blitting."""
+    # Construct the scatter which we will update during animation
+    # as the raindrops develop.
+    scat = scatter_drops(sim, ax, animated=blit)
+
+    def update(frame_number):
+        sim.step()
+        update_drops(sim, scat)
+        return scat,
+
+    return FuncAnimation(fig, update, interval=interval, save_count=save_count, blit=blit)
+
+
+def frame_palette(cmap='spring', levels=16):
+    """
+    Fixed 256-color GIF palette: `levels` colormap hues over `levels` opacities on white.
+
+    Drops are rings of one colormap color fading into a white background, so nearly
+    every rendered pixel is close to a palette entry. A palette that does not depend
+    on frame contents keeps the GIF encoding deterministic and lets every frame share
+    one global color table.
+    """
+    hues = plt.get_cmap(cmap)(np.linspace(0, 1, levels))[:, :3]
+    opacity = np.linspace(0, 1, levels)[:, None, None]
+    colors = 1 - opacity * (1 - hues[None, :, :])
+    palette = Image.new('P', (1, 1))
+    palette.putpalette(np.round(colors * 255).astype(np.uint8).ravel().tolist())
+    return palette
+
+
+class GifWriter:
+    """Append frames to a looping GIF as they arrive, holding none of them in memory."""
+
+    def __init__(self, path, size, fps, palette):
+        self.size = size
+        self.palette = palette
+        self.duration = round(1000 / fps)
+        self.file = open(path, 'wb')
+        self.frames = 0
+
+    def write(self, pixels):
+        """Add one frame, given as palette indices (bytes, row-major)."""
+        frame = Image.frombytes('P', self.size, pixels)
+        frame.putpalette(self.palette.getpalette())
+        if self.frames == 0:
+            header, _ = GifImagePlugin.getheader(frame, info={'loop': 0})
+            self.file.write(b''.join(header))
+        self.file.write(b''.join(GifImagePlugin.getdata(frame, duration=self.duration)))
+        self.frames += 1
+
+    def close(self):
+        self.file.write(b';')
+        self.file.close()
+
+
+class FFmpegWriter:
+    """Pipe RGB frames into ffmpeg, with bit-exact flags so reruns give the same file."""
+
+    def __init__(self, path, size, fps):
+        command = [
+            shutil.which('ffmpeg') or 'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{size[0]}x{size[1]}',
+            '-r', str(fps), '-i', '-',
+            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-threads', '1',
+            '-map_metadata', '-1', '-fflags', '+bitexact', '-flags:v', '+bitexact',
+            path,
+            ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, pixels):
+        self.process.stdin.write(pixels)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait():
+            raise RuntimeError(f'ffmpeg exited with status {self.process.returncode}')
+
+
+# Set in each export worker by _init_exporter.
+_exporter = None
+
+
+def _init_exporter(figsize, dpi, mode, cmap):
+    global _exporter
+    plt.switch_backend('Agg')
+    fig, ax = make_figure(figsize, dpi)
+    fig.canvas.draw()
+    _exporter = {
+        'fig': fig,
+        'ax': ax,
+        'background': fig.canvas.copy_from_bbox(fig.bbox),
+        'scatter': None,
+        'mode': mode,
+        'palette': frame_palette(cmap) if mode == 'P' else None,
+        }
+
+
+def render_chunk(task):
+    """Advance a simulation snapshot by n_frames, rasterizing each frame; returns the raw frames."""
+    sim, n_frames = task
+    fig, ax = _exporter['fig'], _exporter['ax']
+    if _exporter['scatter'] is None:
+        _exporter['scatter'] = scatter_drops(sim, ax, animated=True)
+    scat = _exporter['scatter']
+
+    frames = []
+    for _ in range(n_frames):
+        sim.step()
+        update_drops(sim, scat)
+        fig.canvas.restore_region(_exporter['background'])
+        ax.draw_artist(scat)
+        image = Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba())
+        if _exporter['mode'] == 'P':
+            image = image.convert('RGB').quantize(palette=_exporter['palette'], dither=Image.Dither.NONE)
+        else:
+            image = image.convert('RGB')
+        frames.append(image.tobytes())
+    return frames
+
+
+def simulation_chunks(sim, n_frames, chunk_size):
+    """Snapshots of the simulation at the start of every chunk of frames, and the chunk length."""
+    for start in range(0, n_frames, chunk_size):
+        count = min(chunk_size, n_frames - start)
+        yield copy.deepcopy(sim), count
+        for _ in range(count):
+            sim.step()
+
+
+def export(path, sim, n_frames=100, fps=25, figsize=(18, 6), dpi=100,
+           cmap='spring', chunk_size=10, max_workers=None):
+    """
+    Render n_frames of the simulation to a GIF or MP4 file, without a window.
+
+    The simulation is cheap next to rasterization, so the main process runs it ahead
+    and hands a snapshot (drop arrays and random state) at the start of each chunk
+    of frames to a pool of Agg workers. Finished chunks are written in order as soon
+    as they arrive; at most two chunks per worker are in flight, so memory does not
+    grow with the length of the animation. Frames do not depend on which worker drew
+    them, and GIF frames are mapped onto a fixed palette, so the output is
+    byte-for-byte reproducible.
+
+    MP4 output needs ffmpeg on the PATH.
+    """
+    max_workers = max_workers or os.cpu_count()
+    width, height = round(figsize[0] * dpi), round(figsize[1] * dpi)
+    if path.endswith('.gif'):
+        mode = 'P'
+        writer = GifWriter(path, (width, height), fps, frame_palette(cmap))
+    else:
+        mode = 'RGB'
+        writer = FFmpegWriter(path, (width, height), fps)
+
+    chunks = simulation_chunks(sim, n_frames, chunk_size)
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_exporter,
+            initargs=(figsize, dpi, mode, cmap)) as pool:
+        pending = deque()
+        for task in chunks:
+            pending.append(pool.submit(render_chunk, task))
+            if len(pending) >= 2 * max_workers:
+                for frame in pending.popleft().result():
+                    writer.write(frame)
+        while pending:
+            for frame in pending.popleft().result():
+                writer.write(frame)
+    writer.close()
+
+
+def benchmark(drop_counts=(50, 1_000, 10_000, 100_000), n_frames=30, max_seconds=3):
+    """Frames per second of the simulation alone, and with full redraws or blitting on Agg.
+
+    Each measurement stops after n_frames frames or max_seconds, whichever is first.
+    """
+    plt.switch_backend('Agg')
+    for n_drops in drop_counts:
+        sim = RainSimulation(n_drops, spawn_rate=max(1, n_drops // 50))
+        start = time.perf_counter()
+        for _ in range(n_frames):
+            sim.step()
+            sim.edgecolors(), sim.sizes()
+        simulate = n_frames / (time.perf_counter() - start)
+
+        rates = {}
+        for blit in (False, True):
+            sim = RainSimulation(n_drops, spawn_rate=max(1, n_drops // 50))
+            fig, ax = make_figure()
+            scat = scatter_drops(sim, ax, animated=blit)
+            fig.canvas.draw()
+            background = fig.canvas.copy_from_bbox(fig.bbox) if blit else None
+
+            start = time.perf_counter()
+            frames = 0
+            while frames < n_frames and time.perf_counter() - start < max_seconds:
+                frames += 1
+                sim.step()
+                update_drops(sim, scat)
+                if blit:
+                    fig.canvas.restore_region(background)
+                    ax.draw_artist(scat)
+                    fig.canvas.blit(fig.bbox)
+                else:
+                    fig.canvas.draw()
+            rates[blit] = frames / (time.perf_counter() - start)
+            plt.close(fig)
+        print(f'{n_drops:>7,} drops: simulation only {simulate:8.0f} fps, '
+              f'full redraw {rates[False]:6.1f} fps, blit {rates[True]:6.1f} fps')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drops', type=int, default=50)
+    parser.add_argument('--spawn-rate', type=int, default=1, help='drops respawned per frame')
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--export', metavar='PATH', help='write a .gif or .mp4 instead of showing a window')
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help='render processes, defaults to the CPU count')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    elif args.export:
+        sim = RainSimulation(args.drops, spawn_rate=args.spawn_rate)
+        start = time.perf_counter()
+        export(args.export, sim, n_frames=args.frames, fps=args.fps, dpi=args.dpi, max_workers=args.workers)
+        print(f'{args.frames} frames in {time.perf_counter() - start:.1f}s -> {args.export}')
+    else:
+        sim = RainSimulation(args.drops, spawn_rate=args.spawn_rate)
+        fig, ax = make_figure()
+        # Construct the animation, using the update function as the animation director.
+        ani = animate(sim, fig, ax)
+        plt.show()
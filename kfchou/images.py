@@ -0,0 +1,249 @@
+"""Responsive, recompressed variants of the site's images.
+
+Every PNG, JPEG and GIF under `images/` and `assets/` gets:
+
+- WebP variants at each width in `widths` narrower than the original, and at
+  the original width, each kept only if it is smaller than the next wider one
+  (or the original). Photos and animations are lossy at `webp_quality`; still
+  PNGs, mostly charts and screenshots, are also encoded losslessly and keep
+  whichever is smaller. Animated GIFs become animated WebP.
+- a fallback for browsers without WebP: the image recompressed in its own
+  format (optimized PNG, progressive JPEG or optimized GIF) if that is smaller,
+  otherwise the original itself.
+
+Variants are written under `assets/optimized/`, mirroring the source paths, and
+named with the first characters of the source's SHA-256, so a changed image gets
+new URLs. `_data/images.json` maps each source path to its size and variants,
+and `_includes/responsive-image.html` turns an entry into a <picture> with
+srcsets. Neither the variants nor the manifest are committed: the Pages workflow
+runs `make images` before `jekyll build`, and a local build without them falls
+back to the original images. An image whose hash and variants are unchanged is
+never reopened; the others are processed on a process pool, one image per task.
+
+Example usage, from the repository root:
+
+python -m kfchou.images
+python -m kfchou.images --full   # reprocess every image
+
+{% include responsive-image.html src="/images/galaxy.jpg" alt="Galaxy" sizes="(max-width: 800px) 100vw, 800px" %}
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+SOURCE_DIRS = ('images', 'assets')
+OUTPUT_DIR = os.path.join('assets', 'optimized')
+MANIFEST_PATH = os.path.join('_data', 'images.json')
+
+# Bump whenever the encoders change, to reprocess every image.
+PIPELINE_VERSION = 2
+
+default_widths = (480, 960, 1600)
+
+extensions = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.gif': 'GIF'}
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_images(source_dirs=SOURCE_DIRS, output_dir=OUTPUT_DIR):
+    """Paths of the source images, with '/' separators, skipping output_dir."""
+    output_dir = os.path.normpath(output_dir)
+    paths = []
+    for source_dir in source_dirs:
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = sorted(d for d in dirs if os.path.normpath(os.path.join(root, d)) != output_dir)
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in extensions:
+                    paths.append(os.path.join(root, name).replace(os.sep, '/'))
+    return paths
+
+
+def _frames(image):
+    """Every frame of an image as RGB(A), with the per-frame durations of animations."""
+    from PIL import ImageSequence
+
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(image):
+        has_alpha = frame.mode in ('RGBA', 'LA', 'PA') or 'transparency' in frame.info
+        frames.append(frame.convert('RGBA' if has_alpha else 'RGB'))
+        durations.append(frame.info.get('duration', image.info.get('duration', 100)))
+    return frames, durations
+
+
+def _resize(frames, width):
+    from PIL import Image
+
+    if width == frames[0].width:
+        return frames
+    height = round(frames[0].height * width / frames[0].width)
+    return [frame.resize((width, height), Image.Resampling.LANCZOS) for frame in frames]
+
+
+def _encode(frames, durations, fmt, webp_quality, lossless):
+    """Encode frames in fmt; returns the file contents."""
+    first, rest = frames[0], frames[1:]
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        options = {'quality': webp_quality, 'method': 4}
+        if rest:
+            options.update(save_all=True, append_images=rest, duration=durations, loop=0)
+        first.save(buffer, 'WEBP', **options)
+        if lossless:
+            # lossless wins on flat charts and screenshots, lossy on anything resampled or photographic
+            candidate = io.BytesIO()
+            first.save(candidate, 'WEBP', **{**options, 'lossless': True, 'quality': 100})
+            if candidate.tell() < buffer.tell():
+                buffer = candidate
+    elif fmt == 'PNG':
+        first.save(buffer, 'PNG', optimize=True)
+    elif fmt == 'JPEG':
+        first.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    else:
+        palette = [frame.convert('RGB').quantize(256, dither=0) for frame in frames]
+        palette[0].save(
+            buffer, 'GIF', save_all=bool(rest), append_images=palette[1:], duration=durations,
+            loop=0, optimize=True, disposal=1)
+    return buffer.getvalue()
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def process_image(task):
+    """
+    Write the variants of one image; returns its manifest entry.
+
+    task: (source path, source hash, output directory, widths, webp quality).
+
+    Variants are encoded from the widest down, and one is kept only if it is
+    smaller than the next wider one kept, or than the original at full width,
+    so that a srcset never sends a small screen a bigger file.
+    """
+    from PIL import Image
+
+    source, digest, output_dir, widths, webp_quality = task
+    stem, ext = os.path.splitext(source)
+    fmt = extensions[ext.lower()]
+    with Image.open(source) as image:
+        frames, durations = _frames(image)
+    width, height = frames[0].size
+    original_bytes = os.path.getsize(source)
+    lossless = fmt == 'PNG' and len(frames) == 1
+
+    entry = {
+        'hash': digest, 'settings': [PIPELINE_VERSION, list(widths), webp_quality],
+        'width': width, 'height': height, 'bytes': original_bytes, 'webp': [],
+    }
+    limit = original_bytes
+    for target in sorted({w for w in widths if w < width} | {width}, reverse=True):
+        data = _encode(_resize(frames, target), durations, 'WEBP', webp_quality, lossless)
+        if len(data) >= limit:
+            continue
+        path = f'{output_dir}/{stem}-{target}-{digest[:8]}.webp'
+        _write(path, data)
+        entry['webp'].insert(0, [target, f'/{path}', len(data)])
+        limit = len(data)
+
+    path, size = source, original_bytes
+    data = _encode(frames, durations, fmt, webp_quality, lossless)
+    if len(data) < original_bytes:
+        path, size = f'{output_dir}/{stem}-{width}-{digest[:8]}{ext.lower()}', len(data)
+        _write(path, data)
+    entry['fallback'] = [width, f'/{path}', size]
+    return entry
+
+
+def _outputs(entry):
+    return [path.lstrip('/') for _, path, _ in entry['webp'] + [entry['fallback']]]
+
+
+def optimize_images(source_dirs=SOURCE_DIRS, output_dir=OUTPUT_DIR, manifest_path=MANIFEST_PATH,
+                    widths=default_widths, webp_quality=80, max_workers=None, full=False):
+    """
+    Bring the variants of every source image up to date; returns the sources processed.
+
+    max_workers: process count, defaults to the number of CPUs.
+    full: reprocess every image in source_dirs, ignoring the manifest.
+
+    Variants of images that were removed or changed are deleted. Images outside
+    source_dirs keep their manifest entries and variants.
+    """
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    settings = [PIPELINE_VERSION, list(widths), webp_quality]
+    sources = find_images(source_dirs, output_dir)
+    hashes = {source: file_hash(source) for source in sources}
+    stale = [
+        source for source in sources
+        if full or manifest.get(source, {}).get('hash') != hashes[source]
+        or manifest[source]['settings'] != settings
+        or not all(os.path.exists(path) for path in _outputs(manifest[source]))
+    ]
+
+    output_dir = output_dir.replace(os.sep, '/')
+    tasks = [(source, hashes[source], output_dir, tuple(widths), webp_quality) for source in stale]
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for source, entry in zip(stale, pool.map(process_image, tasks)):
+                manifest[source] = entry
+
+    roots = [os.path.normpath(source_dir).replace(os.sep, '/') + '/' for source_dir in source_dirs]
+    scanned = set(sources)
+    manifest = {
+        source: entry for source, entry in sorted(manifest.items())
+        if source in scanned or not source.startswith(tuple(roots))
+    }
+
+    keep = {os.path.normpath(path) for entry in manifest.values() for path in _outputs(entry)}
+    for root in roots:
+        for directory, _, files in os.walk(os.path.join(output_dir, root)):
+            for name in files:
+                path = os.path.normpath(os.path.join(directory, name))
+                if path not in keep:
+                    os.remove(path)
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = f'{manifest_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return stale
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='*', default=SOURCE_DIRS, help='directories of source images')
+    parser.add_argument('--output', default=OUTPUT_DIR, help='directory for the variants')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='JSON manifest read by the Jekyll include')
+    parser.add_argument('--widths', nargs='+', type=int, default=default_widths, help='responsive widths in pixels')
+    parser.add_argument('--quality', type=int, default=80, help='WebP quality of photos')
+    parser.add_argument('--workers', type=int, help='process count; default one per CPU')
+    parser.add_argument('--full', action='store_true', help='reprocess every image')
+    args = parser.parse_args()
+    processed = optimize_images(
+        args.sources, args.output, args.manifest, widths=args.widths, webp_quality=args.quality,
+        max_workers=args.workers, full=args.full)
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    before = sum(entry['bytes'] for entry in manifest.values())
+    # what a browser with WebP support downloads at full width
+    after = sum(min([entry['fallback'][2]] + [size for w, _, size in entry['webp'] if w == entry['width']])
+                for entry in manifest.values())
+    print(f'{len(manifest)} images, {len(processed)} processed; '
+          f'full width {after / 2**20:.1f} MB vs originals {before / 2**20:.1f} MB')
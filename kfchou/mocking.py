@@ -1,3 +1,11 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import queue
+import threading
+import time
 from unittest.mock import patch, MagicMock, ANY, Mock
 import pytest
 
@@ -5,9 +13,15 @@ import pytest
 def get_database_object():
     return None
 
-def check_object_attributes():
-    obj = get_database_object()
-    
+def check_object_attributes(obj_id=None, accessor=None):
+    # with an accessor, objects come from its pool and cache instead
+    if accessor is None:
+        obj = get_database_object()
+    else:
+        obj = accessor.get(obj_id)
+    validate_object(obj)
+
+def validate_object(obj):
     if obj is None:
         raise Exception("object is None")
     
@@ -22,7 +36,98 @@ def check_object_attributes():
     # obj.method returns some value
     if obj.method() == "magical":
         raise Exception("a magical string was returned")
-    
+
+
+class ConnectionPool:
+    """
+    At most `size` connections from `connect()`, opened on first use and reused.
+
+    with pool.connection() as conn:
+        obj = conn.fetch(obj_id)
+
+    Callers wait for a free connection once all `size` are checked out.
+    """
+
+    def __init__(self, connect, size=4):
+        self.connect = connect
+        self.size = size
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self.opened < self.size
+                if can_open:
+                    self.opened += 1
+            if can_open:
+                try:
+                    conn = self.connect()
+                except BaseException:
+                    with self._lock:
+                        self.opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+
+class CachedObjectAccessor:
+    """
+    Fetch database objects through a ConnectionPool, caching them for `ttl` seconds.
+
+    At most `maxsize` objects are kept, evicting the least recently used. None
+    results are not cached, so a missing object is fetched again on the next
+    check. `hits` and `misses` count cache lookups.
+    """
+
+    def __init__(self, pool, ttl=60.0, maxsize=1024, clock=time.monotonic):
+        self.pool = pool
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # obj_id -> (expires at, obj)
+        self._lock = threading.Lock()
+
+    def get(self, obj_id):
+        now = self.clock()
+        with self._lock:
+            entry = self._cache.get(obj_id)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(obj_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with self.pool.connection() as conn:
+            obj = conn.fetch(obj_id)
+
+        if obj is not None:
+            with self._lock:
+                self._cache[obj_id] = (now + self.ttl, obj)
+                self._cache.move_to_end(obj_id)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return obj
+
+    def invalidate(self, obj_id=None):
+        """Drop one cached object, or all of them."""
+        with self._lock:
+            if obj_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(obj_id, None)
+
+
 # from your_module import check_object_attributes
 @patch('kfchou.mocking.get_database_object')
 def test_check_object_is_not_none(mock_get_db_obj):
@@ -65,4 +170,277 @@ def test_check_object_attributes_none_attr(mock_get_db_obj):
 
     # this check passes
     with pytest.raises(TypeError, match='the attribute is a dict instance'):
-        check_object_attributes()
\ No newline at end of file
+        check_object_attributes()
+
+
+@dataclass
+class BatchReport:
+    """
+    Outcome of check_many: one (obj_id, error) pair per check, in input order,
+    with error None if the object passed, else the exception raised.
+    """
+    results: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def checks(self):
+        return len(self.results)
+
+    @property
+    def failed(self):
+        """obj_id -> exception, for every id that failed a check."""
+        return {obj_id: error for obj_id, error in self.results if error is not None}
+
+    @property
+    def passed(self):
+        return [obj_id for obj_id, error in self.results if error is None]
+
+    @property
+    def throughput(self):
+        """Checks per second, repeated ids included."""
+        return self.checks / self.seconds if self.seconds else float("inf")
+
+def _check(fetch, obj_id):
+    try:
+        validate_object(fetch(obj_id))
+    except Exception as error:
+        return error
+    return None
+
+def check_many(obj_ids, fetch, max_workers=8):
+    """
+    Fetch and validate objects on a thread pool, at most max_workers at a time.
+
+    fetch: obj_id -> object, e.g. `CachedObjectAccessor.get`.
+    A failing object is recorded in the report instead of stopping the batch;
+    every id is checked and reported, repeats included.
+    """
+    obj_ids = list(obj_ids)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        errors = list(pool.map(lambda obj_id: _check(fetch, obj_id), obj_ids))
+    return BatchReport(list(zip(obj_ids, errors)), time.perf_counter() - start)
+
+async def check_many_async(obj_ids, fetch, concurrency=8):
+    """
+    Like check_many, with fetch a coroutine function and at most `concurrency` fetches in flight.
+    """
+    obj_ids = list(obj_ids)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def check(obj_id):
+        try:
+            async with limit:
+                obj = await fetch(obj_id)
+            validate_object(obj)
+        except Exception as error:
+            return error
+        return None
+
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(check(obj_id) for obj_id in obj_ids))
+    return BatchReport(list(zip(obj_ids, errors)), time.perf_counter() - start)
+
+
+# An in-process stand-in for the database: every connect and fetch sleeps for
+# `latency` seconds, and `objects` maps ids to what fetch returns. It counts
+# calls and tracks the most fetches in flight at once.
+class FakeBackend:
+    def __init__(self, objects, latency=0.01):
+        self.objects = objects
+        self.latency = latency
+        self.connects = 0
+        self.fetches = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # connect and fetch run on pool threads
+        self._lock = threading.Lock()
+
+    def connect(self):
+        time.sleep(self.latency)
+        with self._lock:
+            self.connects += 1
+        return self
+
+    def fetch(self, obj_id):
+        with self._lock:
+            self.fetches += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        return self.objects.get(obj_id)
+
+# The same, with an async fetch.
+class AsyncFakeBackend:
+    def __init__(self, objects, latency=0.01):
+        self.objects = objects
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, obj_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        return self.objects.get(obj_id)
+
+
+def make_object(attr="value", method_result="ordinary"):
+    obj = MagicMock()
+    obj.attr = attr
+    obj.method.return_value = method_result
+    return obj
+
+@pytest.fixture
+def backend():
+    return FakeBackend({i: make_object() for i in range(10)})
+
+def test_accessor_counts_hits_and_misses(backend):
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect, size=2))
+    for _ in range(3):
+        for obj_id in range(10):
+            check_object_attributes(obj_id, accessor)
+
+    assert (accessor.hits, accessor.misses) == (20, 10)
+    assert backend.fetches == 10
+    assert backend.connects == 1
+
+def test_cache_and_pool_cut_repeated_round_trips(backend):
+    # uncached: a fresh connection and fetch per check, like get_database_object()
+    for obj_id in list(range(10)) * 3:
+        validate_object(backend.connect().fetch(obj_id))
+    assert (backend.connects, backend.fetches) == (30, 30)
+
+    backend.connects = backend.fetches = 0
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect, size=2))
+    for obj_id in list(range(10)) * 3:
+        check_object_attributes(obj_id, accessor)
+
+    # sequential checks reuse one pooled connection; each id is fetched once
+    assert (backend.connects, backend.fetches) == (1, 10)
+    assert (accessor.hits, accessor.misses) == (20, 10)
+
+def test_accessor_refetches_after_ttl(backend):
+    now = [0.0]
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect), ttl=5, clock=lambda: now[0])
+    accessor.get(1)
+    now[0] = 4.9
+    accessor.get(1)
+    now[0] = 5.0
+    accessor.get(1)
+
+    assert (accessor.hits, accessor.misses) == (1, 2)
+
+def test_accessor_evicts_least_recently_used(backend):
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect), maxsize=2)
+    accessor.get(1)
+    accessor.get(2)
+    accessor.get(1)
+    accessor.get(3)  # evicts 2
+
+    accessor.get(1)
+    accessor.get(2)
+    assert backend.fetches == 4
+
+def test_invalidate_forces_a_fetch(backend):
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect))
+    accessor.get(1)
+    accessor.get(2)
+    accessor.invalidate(1)
+    accessor.get(1)
+    accessor.get(2)
+    accessor.invalidate()
+    accessor.get(2)
+
+    assert backend.fetches == 4
+
+def test_pool_never_opens_more_than_size(backend):
+    pool = ConnectionPool(backend.connect, size=3)
+    accessor = CachedObjectAccessor(pool, ttl=0)
+    threads = [threading.Thread(target=accessor.get, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.opened == backend.connects <= 3
+    assert backend.fetches == 10
+
+def test_missing_object_is_not_cached(backend):
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect))
+    for _ in range(2):
+        with pytest.raises(Exception, match="object is None"):
+            check_object_attributes("missing", accessor)
+
+    assert backend.fetches == 2
+
+@pytest.mark.parametrize("obj, error, message", [
+    (make_object(attr=None), ValueError, "attribute is not set"),
+    (make_object(attr={}), TypeError, "the attribute is a dict instance"),
+    (make_object(method_result="magical"), Exception, "a magical string was returned"),
+])
+def test_cached_objects_keep_error_semantics(obj, error, message):
+    accessor = CachedObjectAccessor(ConnectionPool(FakeBackend({1: obj}, latency=0).connect))
+    for _ in range(2):
+        with pytest.raises(error, match=message):
+            check_object_attributes(1, accessor)
+
+    assert (accessor.hits, accessor.misses) == (1, 1)
+
+@pytest.fixture
+def mixed_objects():
+    objects = {i: make_object() for i in range(40)}
+    objects[3] = make_object(attr=None)
+    objects[7] = make_object(attr={})
+    objects[11] = make_object(method_result="magical")
+    del objects[13]
+    return objects
+
+def assert_mixed_results(report):
+    assert len(report.results) == 40
+    assert len(report.passed) == 36
+    assert sorted(report.failed) == [3, 7, 11, 13]
+    assert isinstance(report.failed[3], ValueError)
+    assert isinstance(report.failed[7], TypeError)
+    assert str(report.failed[11]) == "a magical string was returned"
+    assert str(report.failed[13]) == "object is None"
+
+def test_check_many_collects_every_result(mixed_objects):
+    backend = FakeBackend(mixed_objects, latency=0)
+    report = check_many(range(40), backend.fetch)
+
+    assert_mixed_results(report)
+    assert report.throughput > 0
+
+def test_check_many_async_collects_every_result(mixed_objects):
+    backend = AsyncFakeBackend(mixed_objects, latency=0)
+    report = asyncio.run(check_many_async(range(40), backend.fetch))
+
+    assert_mixed_results(report)
+
+def test_check_many_overlaps_fetches(mixed_objects):
+    backend = FakeBackend(mixed_objects, latency=0.01)
+    report = check_many(range(40), backend.fetch, max_workers=8)
+
+    assert_mixed_results(report)
+    assert backend.fetches == 40
+    assert 1 < backend.max_in_flight <= 8
+
+def test_check_many_async_respects_concurrency(mixed_objects):
+    backend = AsyncFakeBackend(mixed_objects, latency=0.01)
+    report = asyncio.run(check_many_async(range(40), backend.fetch, concurrency=8))
+
+    assert_mixed_results(report)
+    assert backend.max_in_flight == 8
+
+def test_check_many_through_cached_accessor(backend):
+    accessor = CachedObjectAccessor(ConnectionPool(backend.connect, size=4))
+    report = check_many(list(range(10)) * 5, accessor.get, max_workers=4)
+
+    assert report.checks == 50
+    assert report.passed == list(range(10)) * 5
+    assert report.failed == {}
+    assert backend.connects <= 4
@@ -0,0 +1,151 @@
+"""Build resume/resume.pdf from resume.md, and rebuild it on every save.
+
+`make resume` runs pandoc and then a fresh `weasyprint` process, which pays
+weasyprint's import, font configuration and stylesheet parsing on every build.
+This module keeps all of that in one process:
+
+- weasyprint is imported and its FontConfiguration created once
+- resume.css is parsed once, and again only when its contents change
+- images such as the header icons are decoded once, through weasyprint's cache
+- a build is skipped when resume.md, resume.css and resume-template.html hash
+  the same as for the last PDF written, recorded in `.cache/resume.sha256`
+
+pandoc still turns the markdown and its metadata into HTML with the template,
+writing to a pipe instead of an intermediate file.
+
+Example usage, from the repository root:
+
+python -m kfchou.resume           # build once, if the sources changed
+python -m kfchou.resume --watch   # rebuild on save, until Ctrl+C
+"""
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import time
+
+RESUME_DIR = 'resume'
+SOURCES = ('resume.md', 'resume.css', 'resume-template.html')
+HASH_PATH = os.path.join('.cache', 'resume.sha256')
+
+# The stylesheet is passed to weasyprint already parsed instead.
+_stylesheet_link = re.compile(r'<link rel="stylesheet" href="resume\.css"\s*/?>')
+
+
+def sources_hash(resume_dir=RESUME_DIR):
+    """SHA-256 over the contents of the resume sources."""
+    digest = hashlib.sha256()
+    for name in SOURCES:
+        with open(os.path.join(resume_dir, name), 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResumeRenderer:
+    """
+    A weasyprint renderer kept warm between builds.
+
+    Example usage:
+
+    renderer = ResumeRenderer()
+    renderer.build()          # renders; returns the seconds taken
+    renderer.build()          # sources unchanged: returns None
+    """
+
+    def __init__(self, resume_dir=RESUME_DIR, output='resume.pdf', hash_path=HASH_PATH):
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.resume_dir = os.fspath(resume_dir)
+        self.output = os.path.join(self.resume_dir, output)
+        self.hash_path = os.fspath(hash_path)
+        self.font_config = FontConfiguration()
+        # image cache shared by every render
+        self.cache = {}
+        self._css = None
+        self._css_hash = None
+
+    def stylesheet(self):
+        """The parsed resume.css, reparsed only when the file changes."""
+        from weasyprint import CSS
+
+        path = os.path.join(self.resume_dir, 'resume.css')
+        with open(path, 'rb') as f:
+            css = f.read()
+        digest = hashlib.sha256(css).hexdigest()
+        if digest != self._css_hash:
+            self._css = CSS(string=css.decode('utf-8'), base_url=self.resume_dir, font_config=self.font_config)
+            self._css_hash = digest
+        return self._css
+
+    def to_html(self):
+        """resume.md through pandoc and the template, as a string."""
+        result = subprocess.run(
+            ['pandoc', 'resume.md', '--template', 'resume-template.html',
+             '--metadata', 'title=Resume', '--standalone'],
+            cwd=self.resume_dir, capture_output=True, text=True, check=True)
+        return _stylesheet_link.sub('', result.stdout)
+
+    def last_hash(self):
+        if not os.path.exists(self.hash_path) or not os.path.exists(self.output):
+            return None
+        with open(self.hash_path) as f:
+            return f.read().strip()
+
+    def build(self, force=False):
+        """Render the PDF if the sources changed; returns the seconds taken, or None if skipped."""
+        from weasyprint import HTML
+
+        digest = sources_hash(self.resume_dir)
+        if not force and digest == self.last_hash():
+            return None
+
+        start = time.perf_counter()
+        html = HTML(string=self.to_html(), base_url=self.resume_dir)
+        tmp_path = f'{self.output}.tmp'
+        html.write_pdf(
+            tmp_path, stylesheets=[self.stylesheet()], font_config=self.font_config, cache=self.cache)
+        os.replace(tmp_path, self.output)
+
+        directory = os.path.dirname(self.hash_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.hash_path, 'w') as f:
+            f.write(digest)
+        return time.perf_counter() - start
+
+    def watch(self, interval=0.2):
+        """Rebuild whenever a source file is saved with new contents, until interrupted."""
+        paths = [os.path.join(self.resume_dir, name) for name in SOURCES]
+        mtimes = None
+        while True:
+            current = [os.stat(path).st_mtime_ns for path in paths]
+            if current != mtimes:
+                mtimes = current
+                try:
+                    seconds = self.build()
+                except (subprocess.CalledProcessError, OSError, ValueError) as error:
+                    print(f'build failed: {getattr(error, "stderr", None) or error}')
+                else:
+                    if seconds is not None:
+                        print(f'{time.strftime("%H:%M:%S")} wrote {self.output} in {seconds:.2f}s')
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--watch', action='store_true', help='rebuild on every save, until Ctrl+C')
+    parser.add_argument('--force', action='store_true', help='build even if the sources are unchanged')
+    parser.add_argument('--dir', default=RESUME_DIR, help='directory with resume.md, resume.css and the template')
+    args = parser.parse_args()
+
+    renderer = ResumeRenderer(args.dir)
+    seconds = renderer.build(force=args.force)
+    print(f'wrote {renderer.output} in {seconds:.2f}s' if seconds is not None else f'{renderer.output} is up to date')
+    if args.watch:
+        print(f'watching {", ".join(SOURCES)} in {args.dir}/ (Ctrl+C to stop)')
+        try:
+            renderer.watch()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,321 @@
+"""Build the site search index from the markdown posts in `_posts/`.
+
+Every post's title, categories and body are tokenized and stemmed, and the
+terms are written as an inverted index, term -> ids of the posts containing it,
+under `assets/search/`:
+
+    manifest.json     shard keys and content hashes, and how many posts each docs shard holds
+    terms/<key>.json  {term: delta-encoded post ids} for the terms starting with <key>
+    docs/<n>.json     title, url, date and categories of the posts with ids n * DOCS_PER_SHARD...
+
+Term shards start as one per first character and are split on the next
+character whenever they exceed `max_shard_bytes`, so a query loads the manifest,
+one small shard per query word and one docs shard per page of results, however
+many posts the blog has. `assets/search.js` mirrors `tokenize` and `stem` in the
+browser and matches every query word as a prefix of the indexed terms.
+
+Builds are incremental. The stemmed terms and metadata of each post are kept in
+`.cache/search_index.json` with the SHA-256 of the post file, only new or
+changed posts are re-tokenized, and only shards whose contents changed are
+rewritten. Post ids are stable across builds, so unchanged docs shards stay
+unchanged too.
+
+Example usage, from the repository root:
+
+python -m kfchou.search_index
+python -m kfchou.search_index --full   # ignore the cache
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+
+POSTS_DIR = '_posts'
+OUTPUT_DIR = os.path.join('assets', 'search')
+CACHE_PATH = os.path.join('.cache', 'search_index.json')
+
+# Bump whenever tokenize, stem or the output format change, to invalidate caches.
+INDEX_VERSION = 1
+
+DOCS_PER_SHARD = 64
+
+# Short, frequent words that would put nearly every post in their postings.
+# Keep in sync with assets/search.js.
+stopwords = frozenset('''
+a an and are as at be but by can do for from has have how i if in into is it its
+me my not of on or so than that the their then there these they this to was we
+were what when which while who why will with you your
+'''.split())
+
+_post_name = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})-(.+)\.(md|markdown|html)$')
+_token = re.compile(r'[a-z0-9]+')
+_vowel = re.compile(r'[aeiouy]')
+
+# Markup removed before tokenizing: liquid tags, html tags, and link and image targets.
+_markup = [
+    re.compile(r'\{%.*?%\}|\{\{.*?\}\}', re.DOTALL),
+    re.compile(r'<[^>]+>'),
+    re.compile(r'\]\([^)]*\)'),
+    re.compile(r'^\s*\[[^\]]+\]:\s*\S+.*$', re.MULTILINE),
+    re.compile(r'https?://\S+'),
+]
+
+
+def stem(word):
+    """
+    Strip common English suffixes, so that 'cache', 'caches', 'cached' and 'caching' index as 'cach'.
+
+    A small, predictable subset of the Porter stemmer, small enough to mirror in
+    JavaScript: plurals, -ed, -ing and -ly, undoubling the final consonant that
+    -ed and -ing leave behind ('running' -> 'run'), then a final -e.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    else:
+        for suffix in ('ing', 'ed', 'ly'):
+            base = word[:-len(suffix)]
+            if word.endswith(suffix) and len(base) >= 3 and _vowel.search(base):
+                if suffix != 'ly' and base[-1] == base[-2] and base[-1] not in 'aeioulsz':
+                    base = base[:-1]
+                word = base
+                break
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercase words of a text, stemmed, without stopwords or single characters."""
+    return [
+        stem(token) for token in _token.findall(text.lower())
+        if len(token) > 1 and token not in stopwords
+    ]
+
+
+def parse_front_matter(text):
+    """
+    Split a post into its front matter, as a dict of strings and lists, and body.
+
+    Handles the flat `key: value` and `key: [a, b]` entries the posts use, with
+    optional double or single quotes around values.
+    """
+    if not text.startswith('---'):
+        return {}, text
+    end = text.find('\n---', 3)
+    if end < 0:
+        return {}, text
+    meta = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.partition(':')
+        if not sep or not key.strip() or line[0].isspace():
+            continue
+        value = value.strip()
+        if value.startswith('[') and value.endswith(']'):
+            value = [item.strip().strip('"\'') for item in value[1:-1].split(',') if item.strip()]
+        elif value.startswith('"') and value.endswith('"') and len(value) > 1:
+            value = json.loads(value)
+        elif value.startswith("'") and value.endswith("'") and len(value) > 1:
+            value = value[1:-1].replace("''", "'")
+        meta[key.strip()] = value
+    return meta, text[end + 4:].split('\n', 1)[-1]
+
+
+def strip_markup(body):
+    for pattern in _markup:
+        body = pattern.sub(' ', body)
+    return body
+
+
+def read_post(path, baseurl=''):
+    """Metadata and sorted unique terms of one post, named like '2024-09-21-pytest-markers.md'."""
+    match = _post_name.match(os.path.basename(path))
+    if match is None:
+        raise ValueError(f'not a post file name: {path}')
+    year, month, day, slug, _ = match.groups()
+    with open(path, encoding='utf-8') as f:
+        meta, body = parse_front_matter(f.read())
+
+    title = meta.get('title') or slug.replace('-', ' ')
+    categories = meta.get('categories') or []
+    if isinstance(categories, str):
+        categories = categories.split()
+    date = datetime.date(int(year), int(month), int(day))
+    doc = {
+        'title': title,
+        # matches `permalink: /:title/` in _config.yml
+        'url': f'{baseurl}/{slug}/',
+        'date': f'{date:%B} {date.day}, {date.year}',
+        'categories': categories,
+    }
+    text = ' '.join([title, ' '.join(categories), meta.get('excerpt', ''), strip_markup(body)])
+    return doc, sorted(set(tokenize(text)))
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_cache(path):
+    if not os.path.exists(path):
+        return {'posts': {}, 'next_id': 0}
+    with open(path) as f:
+        cached = json.load(f)
+    if cached.get('version') != INDEX_VERSION:
+        return {'posts': {}, 'next_id': 0}
+    return cached
+
+
+def _write_json(path, data):
+    """Write compact JSON, then rename, so the site never serves a truncated file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_encode(data))
+    os.replace(tmp_path, path)
+
+
+def _encode(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def shard_terms(postings, max_shard_bytes):
+    """
+    Group postings into shards keyed by term prefix.
+
+    Starts with one shard per first character and splits any shard larger than
+    max_shard_bytes on the next character. Terms as long as the key they are
+    split from, e.g. 'py' when splitting 'py' into 'pya', 'pyt' and so on, stay
+    in a shard of their own under that key. Every term is in the shard with the
+    longest key that is a prefix of it.
+
+    Returns {key: {term: delta-encoded post ids}}.
+    """
+    encoded = {}
+    size = {}
+    for term, ids in postings.items():
+        encoded[term] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+        # bytes of '"term":[...],' in the shard file
+        size[term] = len(term) + 4 + len(_encode(encoded[term]))
+
+    groups = {}
+    for term in sorted(postings):
+        groups.setdefault(term[:1], []).append(term)
+    shards = {}
+    pending = list(groups.items())
+    while pending:
+        key, terms = pending.pop()
+        longer = [term for term in terms if len(term) > len(key)]
+        if sum(size[term] for term in terms) <= max_shard_bytes or not longer:
+            shards[key] = {term: encoded[term] for term in terms}
+            continue
+        exact = [term for term in terms if len(term) == len(key)]
+        if exact:
+            shards[key] = {term: encoded[term] for term in exact}
+        children = {}
+        for term in longer:
+            children.setdefault(term[:len(key) + 1], []).append(term)
+        pending.extend(children.items())
+    return shards
+
+
+def build_index(posts_dir=POSTS_DIR, output_dir=OUTPUT_DIR, cache_path=CACHE_PATH,
+                baseurl='', max_shard_bytes=32 * 1024, full=False):
+    """
+    Update the search index for the posts in posts_dir.
+
+    full: re-tokenize every post instead of only the new and changed ones.
+
+    Returns a dict with the number of posts indexed, posts re-tokenized and
+    shard files written and removed.
+    """
+    cache = {'posts': {}, 'next_id': 0} if full else _load_cache(cache_path)
+    previous = cache['posts']
+    posts = {}
+    tokenized = 0
+    for name in sorted(os.listdir(posts_dir)):
+        if not _post_name.match(name):
+            continue
+        path = os.path.join(posts_dir, name)
+        digest = file_hash(path)
+        entry = previous.get(name)
+        if entry is not None and entry['hash'] == digest:
+            posts[name] = entry
+            continue
+        doc, terms = read_post(path, baseurl=baseurl)
+        post_id = entry['id'] if entry is not None else cache['next_id']
+        cache['next_id'] = max(cache['next_id'], post_id + 1)
+        posts[name] = {'hash': digest, 'id': post_id, 'doc': doc, 'terms': terms}
+        tokenized += 1
+
+    postings = {}
+    for entry in sorted(posts.values(), key=lambda entry: entry['id']):
+        for term in entry['terms']:
+            postings.setdefault(term, []).append(entry['id'])
+
+    docs_shards = {}
+    for entry in posts.values():
+        shard, slot = divmod(entry['id'], DOCS_PER_SHARD)
+        docs = docs_shards.setdefault(str(shard), [None] * DOCS_PER_SHARD)
+        doc = entry['doc']
+        docs[slot] = [doc['title'], doc['url'], doc['date'], doc['categories']]
+
+    files = {os.path.join('docs', f'{shard}.json'): docs for shard, docs in docs_shards.items()}
+    term_shards = shard_terms(postings, max_shard_bytes)
+    files.update({os.path.join('terms', f'{key}.json'): shard for key, shard in term_shards.items()})
+    hashes = {name: hashlib.sha256(_encode(data)).hexdigest()[:8] for name, data in files.items()}
+
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    old_hashes = {}
+    if os.path.exists(manifest_path) and not full:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        old_hashes.update({os.path.join('docs', f'{k}.json'): v for k, v in manifest['docs'].items()})
+        old_hashes.update({os.path.join('terms', f'{k}.json'): v for k, v in manifest['terms'].items()})
+
+    written = 0
+    for name, data in files.items():
+        path = os.path.join(output_dir, name)
+        if old_hashes.get(name) != hashes[name] or not os.path.exists(path):
+            _write_json(path, data)
+            written += 1
+    removed = 0
+    for subdir in ('docs', 'terms'):
+        directory = os.path.join(output_dir, subdir)
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            if os.path.join(subdir, name) not in files:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+
+    _write_json(manifest_path, {
+        'version': INDEX_VERSION,
+        'docs_per_shard': DOCS_PER_SHARD,
+        'docs': {shard: hashes[os.path.join('docs', f'{shard}.json')] for shard in sorted(docs_shards, key=int)},
+        'terms': {key: hashes[os.path.join('terms', f'{key}.json')] for key in sorted(term_shards)},
+    })
+    cache['posts'] = posts
+    cache['version'] = INDEX_VERSION
+    _write_json(cache_path, cache)
+    return {'posts': len(posts), 'tokenized': tokenized, 'written': written, 'removed': removed}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', default=POSTS_DIR, help='directory of markdown posts')
+    parser.add_argument('--output', default=OUTPUT_DIR, help='directory for the index files')
+    parser.add_argument('--cache', default=CACHE_PATH, help='per-post cache of hashes and terms')
+    parser.add_argument('--baseurl', default='', help="site.baseurl from _config.yml")
+    parser.add_argument('--full', action='store_true', help='re-tokenize every post')
+    args = parser.parse_args()
+    stats = build_index(args.posts, args.output, args.cache, baseurl=args.baseurl, full=args.full)
+    print(f"{stats['posts']} posts indexed, {stats['tokenized']} re-tokenized; "
+          f"{stats['written']} shard files written, {stats['removed']} removed")
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from kfchou import images
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def _noise(path, width, height, seed):
+    """A PNG of random pixels, which no encoder can shrink much."""
+    import numpy as np
+
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(pixels).save(path)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """A site root with two source images, as the working directory."""
+    monkeypatch.chdir(tmp_path)
+    _noise('images/a.png', 600, 40, 0)
+    _noise('images/b.png', 300, 40, 1)
+    return tmp_path
+
+
+def _optimize(**kwargs):
+    return images.optimize_images(['images'], widths=(200, 400), max_workers=1, **kwargs)
+
+
+def test_second_run_is_a_no_op(site):
+    assert sorted(_optimize()) == ['images/a.png', 'images/b.png']
+    outputs = sorted(p for p in (site / 'assets' / 'optimized').rglob('*') if p.is_file())
+    manifest = (site / images.MANIFEST_PATH).read_text()
+    mtimes = [p.stat().st_mtime_ns for p in outputs]
+
+    assert _optimize() == []
+    assert sorted(p for p in (site / 'assets' / 'optimized').rglob('*') if p.is_file()) == outputs
+    assert [p.stat().st_mtime_ns for p in outputs] == mtimes
+    assert (site / images.MANIFEST_PATH).read_text() == manifest
+
+    _noise('images/b.png', 300, 40, 2)
+    assert _optimize() == ['images/b.png']
+
+
+def test_variants_shrink_with_width(site, monkeypatch):
+    # fake WebP sizes by width: 400 px is no smaller than full width, so it is dropped
+    sizes = {600: 3000, 400: 3000, 200: 1000}
+
+    def encode(frames, durations, fmt, webp_quality, lossless):
+        if fmt != 'WEBP':
+            return b'x' * os.path.getsize('images/a.png')
+        return b'x' * sizes[frames[0].size[0]]
+
+    monkeypatch.setattr(images, '_encode', encode)
+    entry = images.process_image(('images/a.png', '0' * 64, 'assets/optimized', (200, 400), 80))
+    assert [(width, size) for width, _, size in entry['webp']] == [(200, 1000), (600, 3000)]
+    assert entry['fallback'][1] == '/images/a.png'
+    assert not os.path.exists('assets/optimized/images/a-400-00000000.webp')
+
+
+def test_real_variants_are_smaller_than_wider_ones(site):
+    _optimize()
+    with open(images.MANIFEST_PATH) as f:
+        manifest = json.load(f)
+    for entry in manifest.values():
+        sizes = [size for _, _, size in entry['webp']]
+        assert sizes == sorted(set(sizes))
+        assert all(size < entry['bytes'] for size in sizes)
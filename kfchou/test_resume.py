@@ -0,0 +1,43 @@
+import os
+import shutil
+
+import pytest
+
+from kfchou import resume
+
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    """A copy of the resume sources and icons, without the built PDF."""
+    directory = tmp_path / 'resume'
+    source = os.path.join(os.path.dirname(__file__), os.pardir, resume.RESUME_DIR)
+    shutil.copytree(source, directory, ignore=shutil.ignore_patterns('*.pdf', '*-preview.html'))
+    return directory
+
+
+def test_sources_hash_follows_contents(resume_dir):
+    before = resume.sources_hash(resume_dir)
+    os.utime(resume_dir / 'resume.md')
+    assert resume.sources_hash(resume_dir) == before
+    with open(resume_dir / 'resume.css', 'a') as f:
+        f.write('\n/* edited */\n')
+    assert resume.sources_hash(resume_dir) != before
+
+
+@pytest.mark.skipif(shutil.which('pandoc') is None, reason='pandoc is not installed')
+def test_build_skips_unchanged_sources(resume_dir):
+    pytest.importorskip('weasyprint')
+    renderer = resume.ResumeRenderer(resume_dir, hash_path=resume_dir / '.cache' / 'resume.sha256')
+    pdf = resume_dir / 'resume.pdf'
+
+    assert renderer.build() is not None
+    first = pdf.read_bytes()
+    assert first.startswith(b'%PDF')
+
+    assert renderer.build() is None
+    assert pdf.read_bytes() == first
+
+    with open(resume_dir / 'resume.md', 'a') as f:
+        f.write('\nOne more line.\n')
+    assert renderer.build() is not None
+    assert pdf.read_bytes() != first
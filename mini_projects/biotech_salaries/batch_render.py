@@ -0,0 +1,167 @@
+"""Render a declared set of charts in parallel, skipping the ones that are up to date.
+
+Each chart is a plain dict, so specs can live in a list in the notebook or a JSON file:
+
+spec = {
+    'output': '../../assets/2025-06-biotech/base-vs-size-2024.png',
+    'chart': 'helper.make_multi_dumbbell',    # importable 'module.function'
+    'filter': {'Economic Region': us_regions},  # optional: column -> allowed values
+    'groupby': ['Seniority Level', 'Company Detail - Approximate Company Size'],
+    'agg': {'Compensation - Annual Base Salary/Pay': 'median'},  # optional, with groupby
+    'kwargs': {'x_column': ..., 'y_column': ..., 'groups': [...], ...},
+    'titles': {'title_label': ..., 'subtitle_label': ..., 'base_xpos': -0.23},
+    'xaxis_format': '${x:,.0f}',                # optional tick format string
+    'savefig': {'dpi': 300, 'bbox_inches': 'tight'},
+}
+
+The chart function receives the (filtered, aggregated) frame as `df` plus `kwargs`,
+and returns (figure, axes). Titles are added with `stylize_mpl.add_titles`.
+
+Charts render on a process pool with the Agg backend. The preprocessed frame is
+pickled to the cache directory once and each worker loads it once at start-up,
+rather than receiving a copy with every task. A manifest records a hash of each
+chart's spec, of the frame and of the chart code; charts whose hashes and output
+file are unchanged are skipped.
+
+Example usage:
+
+import batch_render
+rendered = batch_render.render_charts(df, specs)
+"""
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from hashing import file_hash, frame_hash
+
+CACHE_DIR = '.cache'
+
+# Set in each worker by _init_worker.
+_frame = None
+
+
+def code_hash(spec):
+    """
+    Hash of the code that draws a chart: the chart function's module, stylize_mpl
+    for the titles, and this module for everything in between.
+    """
+    module = spec['chart'].rpartition('.')[0]
+    paths = [inspect.getsourcefile(importlib.import_module(name)) for name in (module, 'stylize_mpl', __name__)]
+    return hashlib.sha256(':'.join(file_hash(path) for path in paths).encode()).hexdigest()
+
+
+def spec_hash(spec, data_hash, chart_code_hash=''):
+    """Hash of a chart spec together with the hashes of the frame and the code it is drawn with."""
+    payload = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha256(f'{data_hash}:{chart_code_hash}:{payload}'.encode()).hexdigest()
+
+
+def _init_worker(frame_path, theme):
+    global _frame
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    if theme:
+        import seaborn as sns
+        sns.set_theme()
+    _frame = pd.read_pickle(frame_path)
+
+
+def _resolve(name):
+    module, _, function = name.rpartition('.')
+    return getattr(importlib.import_module(module), function)
+
+
+def prepare_frame(df, spec):
+    """Apply a spec's optional filter and groupby aggregation."""
+    for column, values in spec.get('filter', {}).items():
+        df = df[df[column].isin(values)]
+    if 'groupby' in spec:
+        grouped = df.groupby(spec['groupby'], observed=True)
+        df = grouped.agg(spec['agg']).reset_index()
+    return df
+
+
+def render_chart(spec):
+    """Draw and save one chart from the worker's frame; returns the output path."""
+    import matplotlib.pyplot as plt
+    import stylize_mpl as sm
+
+    df = prepare_frame(_frame, spec)
+    f, ax = _resolve(spec['chart'])(df=df, **spec.get('kwargs', {}))
+
+    if 'xaxis_format' in spec:
+        ax.xaxis.set_major_formatter(spec['xaxis_format'])
+    if 'titles' in spec:
+        sm.add_titles(fig=f, **spec['titles'])
+
+    directory = os.path.dirname(spec['output'])
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    f.savefig(spec['output'], **spec.get('savefig', {}))
+    plt.close(f)
+    return spec['output']
+
+
+def render_charts(df, specs, max_workers=None, cache_dir=CACHE_DIR, force=False, theme=True):
+    """
+    Render every out-of-date chart in specs; returns the output paths that were drawn.
+
+    max_workers: process count, defaults to the number of CPUs.
+    force: re-render every chart, ignoring the manifest.
+    theme: apply `sns.set_theme()` in the workers, as the notebook does.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, 'render-manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    data_hash = frame_hash(df)
+    code_hashes = {}
+    for spec in specs:
+        if spec['chart'] not in code_hashes:
+            code_hashes[spec['chart']] = code_hash(spec)
+    hashes = {spec['output']: spec_hash(spec, data_hash, code_hashes[spec['chart']]) for spec in specs}
+    stale = [
+        spec for spec in specs
+        if force
+        or manifest.get(spec['output']) != hashes[spec['output']]
+        or not os.path.exists(spec['output'])
+    ]
+    if not stale:
+        return []
+
+    frame_path = os.path.join(cache_dir, f'render-frame-{data_hash[:16]}.pkl')
+    df.to_pickle(frame_path)
+    rendered = set()
+    error = None
+    try:
+        with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(frame_path, theme)) as pool:
+            futures = [pool.submit(render_chart, spec) for spec in stale]
+            # a failed chart is raised once the others finish, and they stay cached
+            for future in as_completed(futures):
+                try:
+                    rendered.add(future.result())
+                except Exception as exception:
+                    error = error or exception
+        if error is not None:
+            raise error
+    finally:
+        os.remove(frame_path)
+        for output in rendered:
+            manifest[output] = hashes[output]
+        tmp_path = f'{manifest_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, manifest_path)
+
+    return [spec['output'] for spec in stale]
@@ -0,0 +1,705 @@
+"""Performance checks for the salary survey helpers.
+
+Run from this directory:
+
+    python benchmarks.py
+
+Every benchmark first asserts that the fast path agrees with the reference
+implementation on the real survey data, then times both on a scaled-up input.
+`bench_pipeline` times each stage of the analysis on synthetic surveys of up to
+millions of rows. `bench_instrument` measures what the opt-in stage profiling of
+`instrument` costs when it is off and on.
+
+Timings of the fast paths are compared against `benchmark_baselines.json`, and
+the run fails if any is more than `--tolerance` times slower. Baselines depend
+on the machine; record them with `--update-baselines`:
+
+    python benchmarks.py --only pipeline seniority --update-baselines
+    python benchmarks.py --only pipeline --rows 1000 100000 10000000
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+import bootstrap
+import cube
+import helper
+import ingest
+import instrument
+import mappings
+import pipeline
+import synthetic
+
+BASELINES_PATH = 'benchmark_baselines.json'
+
+# name -> seconds, filled in by the benchmarks that ran
+results = {}
+
+
+def record(name, seconds):
+    """Store a fast-path timing for comparison with the baselines."""
+    results[name] = seconds
+
+
+survey_files = [
+    'r_biotech salary and company survey - 2022.csv',
+    'r_biotech salary and company survey - 2023.csv',
+    'r_biotech salary and company survey - 2024.csv',
+]
+
+
+def load_column(column):
+    """Concatenate one column from every yearly survey file."""
+    frames = [pd.read_csv(path, usecols=[column]) for path in survey_files]
+    return pd.concat(frames, ignore_index=True)[column]
+
+
+def replicate(series, n_rows):
+    """Tile a Series until it has exactly n_rows rows."""
+    repeats = -(-n_rows // len(series))
+    return pd.Series(list(series) * repeats, name=series.name)[:n_rows].reset_index(drop=True)
+
+
+def timeit(func, *args, repeat=1, **kwargs):
+    """Best wall time, in seconds, over `repeat` calls."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_seniority(n_rows=1_000_000):
+    titles = load_column('Role / Title of current position').dropna()
+
+    classifier = mappings.SeniorityClassifier()
+    expected = titles.map(mappings.categorize_title)
+    assert (classifier.classify(titles) == expected).all(), 'classifier disagrees with categorize_title'
+
+    big = replicate(titles, n_rows)
+    reference = timeit(lambda s: s.apply(mappings.categorize_title), big)
+    compiled = timeit(classifier.classify, big, repeat=3)
+    record(f'seniority/{n_rows}', compiled)
+    print(f'map_seniority_levels, {n_rows:,} titles: '
+          f'reference {reference:.2f}s, compiled {compiled:.2f}s ({reference / compiled:.0f}x)')
+
+
+def region_loop(locations, mapping):
+    """The notebook's region assignment: one str.contains scan per region."""
+    regions = pd.Series(np.nan, index=locations.index, dtype=object)
+    for region, keywords in mapping.items():
+        pattern = '|'.join(keywords)
+        regions[locations.str.contains(pattern, case=False, na=False, regex=True)] = region
+    return regions
+
+
+def bench_regions(sizes=(10_000, 100_000, 1_000_000)):
+    locations = load_column('Where is the closest major city or hub?')
+
+    resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+    expected = region_loop(locations, helper.economic_region_mapping)
+    resolved = resolver.resolve(locations)['Economic Region'].astype(object)
+    assert expected.fillna('').equals(resolved.fillna('')), 'resolver disagrees with the notebook loop'
+
+    for n_rows in sizes:
+        big = replicate(locations, n_rows)
+        loop = timeit(region_loop, big, helper.economic_region_mapping)
+        resolver_time = timeit(resolver.resolve, big, repeat=3)
+        record(f'regions/{n_rows}', resolver_time)
+        print(f'region mapping, {n_rows:,} locations: '
+              f'per-region scans {loop:.2f}s ({loop / n_rows * 1e9:.0f} ns/row), '
+              f'resolver {resolver_time:.3f}s ({resolver_time / n_rows * 1e9:.0f} ns/row)')
+
+
+def bench_compensation(n_rows=1_000_000):
+    base_column = 'Compensation - Annual Base Salary/Pay'
+    bonus_column = 'Compensation - Annual Target Bonus ($)'
+    equity_column = 'Compensation - Annual Equity/Stock Option'
+    df = pd.read_csv(survey_files[-1], usecols=[base_column, bonus_column, equity_column])
+
+    def row_wise(df):
+        bonus = df.apply(lambda row: helper.convert_to_float(row[bonus_column], row[base_column]), axis=1)
+        equity = df.apply(lambda row: helper.convert_to_float(row[equity_column], row[base_column]), axis=1)
+        return bonus, equity
+
+    bonus, equity = row_wise(df)
+    comp, _ = helper.parse_compensation(df)
+    assert np.allclose(comp['Annual Target Bonus'], bonus), 'bonus disagrees with convert_to_float'
+    assert np.allclose(comp['Annual Equity'], equity), 'equity disagrees with convert_to_float'
+
+    rng = np.random.default_rng(0)
+    big = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    reference = timeit(row_wise, big)
+    vectorized = timeit(helper.parse_compensation, big, repeat=3)
+    record(f'compensation/{n_rows}', vectorized)
+    print(f'compensation parsing, {n_rows:,} rows: '
+          f'row-wise {reference:.2f}s, vectorized {vectorized:.2f}s ({reference / vectorized:.0f}x)')
+
+
+def reference_multi_dumbbell(df, x_column, y_column, group_column, groups, colors, y_order, marker='o'):
+    """make_multi_dumbbell as it was: a scatterplot per group and a line per row."""
+    f, ax = plt.subplots(figsize=(8, 5))
+    if isinstance(marker, str):
+        marker = [marker] * len(groups)
+    for group, color, mark in zip(groups, colors, marker):
+        linewidth, zorder = (3, 10) if mark == '|' else (1, 2)
+        sns.scatterplot(
+            data=df[df[group_column]==group], x=x_column, y=y_column, color=color,
+            s=100, label=group, marker=mark, linewidth=linewidth, zorder=zorder)
+    for y_row, y_pos in zip(y_order, np.arange(len(y_order))):
+        leftmost = np.min(df[df[y_column]==y_row][x_column])
+        rightmost = np.max(df[df[y_column]==y_row][x_column])
+        ax.plot([leftmost, rightmost], [y_pos, y_pos], color='#777777', zorder=1)
+    return f, ax
+
+
+def reference_dumbbell(df, y_column, x_cols, colors, labels):
+    """make_dumbbell as it was: a line per row, located with iloc."""
+    f, ax = plt.subplots(figsize=(8, 5))
+    for x_col, color, label in zip(x_cols, colors, labels):
+        sns.scatterplot(data=df, x=x_col, y=y_column, color=color, s=100, label=label, zorder=10)
+    for i in range(df.shape[0]):
+        left_point = min(df[x_cols].iloc[i])
+        right_point = max(df[x_cols].iloc[i])
+        ax.plot([left_point, right_point], [df[y_column][i], df[y_column][i]], color='gray', zorder=1)
+    return f, ax
+
+
+def render(make_chart, *args, **kwargs):
+    """Draw a chart to raw RGBA pixels and close it."""
+    f, _ = make_chart(*args, **kwargs)
+    buffer = io.BytesIO()
+    f.savefig(buffer, format='rgba', dpi=100)
+    plt.close(f)
+    return np.frombuffer(buffer.getvalue(), dtype=np.uint8)
+
+
+def build(make_chart, *args, **kwargs):
+    """Create a chart's artists without drawing them, and close it."""
+    f, _ = make_chart(*args, **kwargs)
+    plt.close(f)
+
+
+def dumbbell_frame(n_levels, groups, seed=0):
+    """Long-format medians: one row per (level, group), like the notebook's groupby."""
+    rng = np.random.default_rng(seed)
+    levels = [f'level {i}' for i in range(n_levels)]
+    df = pd.DataFrame({
+        'level': np.repeat(levels, len(groups)),
+        'group': np.tile(groups, n_levels),
+        'salary': rng.normal(120_000, 30_000, n_levels * len(groups)),
+    })
+    return df, levels
+
+
+def bench_multi_dumbbell(sizes=(10, 100, 1_000, 3_000)):
+    groups = ['median', '1-50', '50-200', '200-1000', '1000-5000', '5000+']
+    kwargs = dict(
+        x_column='salary', y_column='level', group_column='group', groups=groups,
+        colors=helper.colors, marker=['|'] + ['o'] * 5)
+
+    df, levels = dumbbell_frame(12, groups)
+    expected = render(reference_multi_dumbbell, df, y_order=levels, **kwargs)
+    assert (render(helper.make_multi_dumbbell, df, y_order=levels, **kwargs) == expected).all(), \
+        'make_multi_dumbbell is not pixel-identical to the reference'
+
+    # Time building the chart; drawing it is dominated by the categorical tick
+    # labels, one per y-level, which cost the same for both implementations.
+    for n_levels in sizes:
+        df, levels = dumbbell_frame(n_levels, groups)
+        reference = timeit(build, reference_multi_dumbbell, df, y_order=levels, **kwargs)
+        batched = timeit(build, helper.make_multi_dumbbell, df, y_order=levels, **kwargs)
+        record(f'multi_dumbbell/{n_levels}', batched)
+        print(f'make_multi_dumbbell, {n_levels:,} y-levels: '
+              f'reference {reference:.2f}s, batched {batched:.3f}s')
+
+def bench_dumbbell(sizes=(10, 100, 1_000)):
+    kwargs = dict(
+        y_column='level', x_cols=['x1', 'x2', 'x3'],
+        colors=['skyblue', 'orange', '#963c4c'], labels=['Base', '+ Bonus', '+ Equity'])
+
+    def frame(n_levels, seed=0):
+        rng = np.random.default_rng(seed)
+        x1 = rng.normal(120_000, 30_000, n_levels)
+        x2 = x1 + rng.uniform(0, 20_000, n_levels)
+        return pd.DataFrame({
+            'level': [f'level {i}' for i in range(n_levels)],
+            'x1': x1, 'x2': x2, 'x3': x2 + rng.uniform(0, 50_000, n_levels),
+        })
+
+    df = frame(12)
+    assert (render(helper.make_dumbbell, df, **kwargs) == render(reference_dumbbell, df, **kwargs)).all(), \
+        'make_dumbbell is not pixel-identical to the reference'
+
+    for n_levels in sizes:
+        df = frame(n_levels)
+        reference = timeit(build, reference_dumbbell, df, **kwargs)
+        batched = timeit(build, helper.make_dumbbell, df, **kwargs)
+        record(f'dumbbell/{n_levels}', batched)
+        print(f'make_dumbbell, {n_levels:,} rows: reference {reference:.2f}s, batched {batched:.3f}s')
+
+
+def bootstrap_loop(values, codes, n_groups, n_resamples, seed=0):
+    """Bootstrap medians with a Python loop over groups and resamples."""
+    rng = np.random.default_rng(seed)
+    medians = np.full((n_groups, n_resamples), np.nan)
+    for group in range(n_groups):
+        group_values = values[codes == group]
+        if len(group_values) == 0:
+            continue
+        for b in range(n_resamples):
+            medians[group, b] = np.median(rng.choice(group_values, len(group_values)))
+    return medians
+
+
+def bench_bootstrap(sizes=(1_750, 10_000, 100_000), n_resamples=1000):
+    base_column = 'Compensation - Annual Base Salary/Pay'
+    df = pd.read_csv(survey_files[-1]).dropna(subset=[base_column])
+    df['Seniority Level'] = mappings.SeniorityClassifier().classify(
+        df['Role / Title of current position'].fillna(''))
+    # The notebook's slices: seniority x company size, 75 groups of 1 to ~140 responses
+    grouped = df.groupby(['Seniority Level', 'Company Detail - Approximate Company Size'], observed=True)
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    values = df[base_column].to_numpy(dtype=float)[codes >= 0]
+    codes = codes[codes >= 0]
+    n_groups = grouped.ngroups
+
+    # Different random streams, so compare the intervals, which agree to within
+    # Monte Carlo error, rather than individual resamples.
+    batched = bootstrap.resample_medians(values, codes, n_groups, n_resamples)
+    loop = bootstrap_loop(values, codes, n_groups, n_resamples)
+    large = np.bincount(codes) >= 30
+    for q in (0.025, 0.5, 0.975):
+        a, b = np.quantile(batched[large], q, axis=1), np.quantile(loop[large], q, axis=1)
+        assert np.allclose(a, b, rtol=0.05), f'bootstrap quantile {q} disagrees with the loop'
+
+    rng = np.random.default_rng(0)
+    for n_rows in sizes:
+        rows = rng.integers(0, len(values), n_rows)
+        reference = timeit(bootstrap_loop, values[rows], codes[rows], n_groups, n_resamples)
+        vectorized = timeit(
+            bootstrap.resample_medians, values[rows], codes[rows], n_groups, n_resamples, repeat=3)
+        record(f'bootstrap/{n_rows}', vectorized)
+        print(f'bootstrap medians, {n_groups} groups, {n_rows:,} rows, B={n_resamples}: '
+              f'loop {reference:.2f}s, batched {vectorized:.2f}s ({reference / vectorized:.0f}x)')
+
+
+def classified_surveys():
+    """Every survey year with seniority, economic region and parsed compensation."""
+    df = ingest.load_surveys()
+    df['Seniority Level'] = mappings.get_classifier().classify(df['Role / Title of current position'])
+    resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+    df['Economic Region'] = resolver.resolve(df['Where is the closest major city or hub?'])['Economic Region']
+    comp, _ = helper.parse_compensation(df)
+    df[comp.columns] = comp
+    return df
+
+
+def bench_compact(n_rows=1_000_000):
+    """Memory of classified frames before and after compact_frame, and group-by time on each."""
+    df = classified_surveys()
+    compact, memory = ingest.compact_frame(df)
+    for column in df:
+        before, after = df[column].astype(object), compact[column].astype(object)
+        assert before.isna().equals(after.isna()), f'{column}: missing values changed'
+        assert (before.dropna() == after.dropna()).all(), f'{column}: values changed'
+    total = memory.loc['total']
+    print(f'compact_frame, {len(df):,} survey rows: {total["MB before"]:.1f} MB -> {total["MB after"]:.1f} MB')
+
+    raw = synthetic.generate_survey(n_rows)
+    df = ingest.clean_survey(raw)
+    df['Seniority Level'] = mappings.SeniorityClassifier().classify(df['Role / Title of current position'])
+    df['Economic Region'] = helper.RegionResolver(
+        {'Economic Region': helper.economic_region_mapping}).resolve(
+        df['Where is the closest major city or hub?'])['Economic Region']
+    comp, _ = helper.parse_compensation(df)
+    df[comp.columns] = comp
+    as_text = df.astype({column: object for column in df.select_dtypes('category')})
+    compact, memory = ingest.compact_frame(df)
+    keys = ['Seniority Level', 'Economic Region', 'Company Detail - Approximate Company Size']
+
+    def median_by(frame):
+        return frame.groupby(keys, observed=True)['Total Annual Compensation'].median()
+
+    expected, medians = median_by(as_text), median_by(compact)
+    assert len(expected) == len(medians) and expected.equals(medians.reindex(expected.index).astype(float)), \
+        'group medians differ between object and categorical columns'
+    text_time = timeit(median_by, as_text, repeat=3)
+    categorical_time = timeit(median_by, compact, repeat=3)
+    record(f'compact/groupby/{n_rows}', categorical_time)
+    text_mb = as_text.memory_usage(index=False, deep=True).sum() / 2**20
+    total = memory.loc['total']
+    print(f'{n_rows:,} synthetic rows: object columns {text_mb:.0f} MB, classified {total["MB before"]:.0f} MB, '
+          f'compacted {total["MB after"]:.0f} MB; median by {len(keys)} keys: '
+          f'object {text_time:.3f}s, categorical {categorical_time:.3f}s ({text_time / categorical_time:.1f}x)')
+
+
+def bench_cube(n_rows=1_000_000, n_new=100):
+    df = classified_surveys()
+    dims = ['Seniority Level', 'Company Detail - Approximate Company Size']
+    filters = {'Seniority Level': 'Scientist', 'Economic Region': 'U.S. West Coast'}
+
+    salary_cube = cube.SalaryCube(df)
+    expected = df.groupby(dims, observed=True)['Annual Base Salary'].median()
+    medians = salary_cube.slice(dims).set_index(dims)['median'].reindex(expected.index)
+    assert np.allclose(medians, expected), 'cube medians disagree with groupby'
+
+    rng = np.random.default_rng(0)
+    big = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    new = big.iloc[-n_new:]
+    build = timeit(cube.SalaryCube, big)
+    grown = cube.SalaryCube(big.iloc[:-n_new])
+    start = time.perf_counter()
+    recomputed = grown.append(new)
+    append = time.perf_counter() - start
+    rebuilt = cube.SalaryCube(big)
+    for dims_key, table in rebuilt.tables.items():
+        assert np.allclose(
+            table.to_numpy(float), grown.tables[dims_key].reindex(table.index).to_numpy(float), equal_nan=True), \
+            f'appended cube disagrees with a rebuild for {dims_key}'
+
+    def filter_median(df):
+        rows = (df['Seniority Level'] == filters['Seniority Level']) & \
+            (df['Economic Region'] == filters['Economic Region'])
+        return df.loc[rows, 'Annual Base Salary'].median()
+
+    scan = timeit(filter_median, big, repeat=3)
+    lookup = timeit(rebuilt.cell, filters, repeat=100)
+    record(f'cube_build/{n_rows}', build)
+    record(f'cube_append/{n_rows}', append)
+    print(f'aggregation cube, {n_rows:,} rows: build {build:.2f}s, '
+          f'append {n_new:,} rows {append:.2f}s ({recomputed} cells recomputed)')
+    print(f'  one slice: filter and median {scan * 1e3:.1f}ms, cube lookup {lookup * 1e6:.0f}us')
+
+
+def reference_strip_chart(df, x_column, y_column, y_order):
+    """The notebook's interactive chart: one SVG trace per level, the rows as hover text."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for idx, level in enumerate(y_order):
+        sub_df = df[df[y_column]==level][[x_column,y_column,'Role / Title of current position']]
+        x_vals = sub_df[x_column]
+        fig.add_scatter(
+            x=x_vals, y=[idx]*len(x_vals), mode='markers', name=level, text=sub_df,
+            hovertemplate='Role Title: %{text[2]}<br>Seniority: %{text[1]}')
+    fig.update_layout(height=800)
+    return fig
+
+
+def bench_strip_chart(sizes=(1_000, 10_000, 100_000)):
+    df = classified_surveys()
+    x_column, y_column = 'Annual Base Salary', 'Seniority Level'
+    y_order = df.groupby(y_column)[x_column].median().sort_values(ascending=False).index
+
+    rng = np.random.default_rng(0)
+    for n_rows in sizes:
+        big = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+        reference = reference_strip_chart(big, x_column, y_column, y_order)
+        single = helper.make_strip_chart(big, x_column, y_column, y_order)
+        sampled = helper.make_strip_chart(big, x_column, y_column, y_order, max_points=20_000)
+        assert len(single.data[0].x) == sum(np.isfinite(np.asarray(t.x, dtype=float)).sum() for t in reference.data), \
+            'strip chart dropped points'
+        sizes_mb = [len(fig.to_json()) / 1e6 for fig in (reference, single, sampled)]
+
+        # building the figure and serializing it, as write_html and the notebook renderer do
+        reference_time = timeit(lambda: reference_strip_chart(big, x_column, y_column, y_order).to_json())
+        single_time = timeit(lambda: helper.make_strip_chart(big, x_column, y_column, y_order).to_json(), repeat=3)
+        record(f'strip_chart/{n_rows}', single_time)
+        print(f'strip chart, {n_rows:,} points: figure JSON '
+              f'per-level traces {sizes_mb[0]:.1f} MB, one Scattergl trace {sizes_mb[1]:.1f} MB, '
+              f'downsampled to 20k {sizes_mb[2]:.1f} MB; build and serialize '
+              f'{reference_time:.2f}s vs {single_time:.2f}s ({reference_time / single_time:.1f}x)')
+
+
+def swarm_frame(n_rows, seed=0):
+    """Salaries in 14 rows, shaped like the survey's base salaries per seniority level."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'salary': rng.lognormal(11.6, 0.35, n_rows),
+        'level': rng.choice([f'level {i}' for i in range(14)], n_rows),
+    })
+
+
+def time_swarmplot(n_rows, timeout):
+    """Seconds for sns.swarmplot to lay out and draw n_rows points, in a fresh process; None on timeout."""
+    code = f"""
+import time, warnings
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import benchmarks
+warnings.simplefilter('ignore')
+df = benchmarks.swarm_frame({n_rows})
+plt.figure(figsize=(15, 8))
+start = time.perf_counter()
+sns.swarmplot(data=df, x='salary', y='level', size=4)
+plt.gcf().canvas.draw()
+print(time.perf_counter() - start)
+"""
+    try:
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    return float(result.stdout)
+
+
+def bench_beeswarm(sizes=(1_000, 10_000, 100_000), timeout=600):
+    for n_rows in sizes:
+        df = swarm_frame(n_rows)
+        helper._beeswarm_cache.clear()
+        layout = timeit(helper.beeswarm_offsets, df['salary'], df['level'], size=4, figsize=(15, 8))
+        cached = timeit(helper.beeswarm_offsets, df['salary'], df['level'], size=4, figsize=(15, 8), repeat=3)
+
+        def draw():
+            f, ax = plt.subplots(figsize=(15, 8))
+            offsets = helper.beeswarm_offsets(df['salary'], df['level'], size=4, figsize=(15, 8))
+            rows = pd.Index(pd.unique(df['level'])).get_indexer(df['level'])
+            ax.scatter(df['salary'], rows + offsets, s=4**2)
+            f.canvas.draw()
+            plt.close(f)
+
+        drawn = timeit(draw)
+        record(f'beeswarm/{n_rows}', layout)
+        seaborn_time = time_swarmplot(n_rows, timeout)
+        seaborn_text = f'{seaborn_time:.2f}s' if seaborn_time is not None else f'> {timeout}s'
+        print(f'beeswarm, {n_rows:,} points: sns.swarmplot {seaborn_text}, '
+              f'layout {layout:.3f}s (cached {cached * 1e3:.1f}ms), layout and draw {drawn:.2f}s')
+
+
+def bench_instrument(n_rows=1_000_000, n_calls=100_000):
+    """Cost of the stage instrumentation, off and on, on the seniority stage."""
+    titles = replicate(load_column('Role / Title of current position').dropna(), n_rows)
+    classifier = mappings.SeniorityClassifier()
+    undecorated = mappings.SeniorityClassifier.classify.__wrapped__
+    classifier.classify(titles)
+
+    bare = timeit(undecorated, classifier, titles, repeat=3)
+    off = timeit(classifier.classify, titles, repeat=3)
+    with instrument.profiling(memory=False):
+        timed_only = timeit(classifier.classify, titles, repeat=3)
+    with instrument.profiling():
+        traced = timeit(classifier.classify, titles, repeat=3)
+    record(f'instrument/off/{n_rows}', off)
+    print(f'seniority stage, {n_rows:,} titles: undecorated {bare:.3f}s, profiling off {off:.3f}s, '
+          f'timing {timed_only:.3f}s, timing and tracemalloc {traced:.3f}s')
+
+    noop = instrument.stage('noop')(lambda: None)
+    per_call = (timeit(lambda: [noop() for _ in range(n_calls)]) -
+                timeit(lambda: [(lambda: None)() for _ in range(n_calls)])) / n_calls
+    print(f'disabled stage overhead: {per_call * 1e9:.0f} ns per call')
+    assert per_call < 5e-6, 'disabled instrumentation should cost well under a microsecond per call'
+
+
+def bench_stage_cache(cache_dir=os.path.join('.cache', 'bench-pipeline')):
+    """The memoized analysis DAG: a cold run, a rerun, and a rerun after editing the region mapping."""
+    cold_run = pipeline.Pipeline(cache_dir)
+    cold_run.stages = pipeline.analysis.stages
+    cold_run.clear()
+    cold = timeit(cold_run.run, 'chart')
+    assert set(cold_run.status.values()) == {'ran'}
+
+    # a new process: nothing in memory, everything on disk
+    analysis = pipeline.Pipeline(cache_dir)
+    analysis.stages = pipeline.analysis.stages
+    warm = timeit(analysis.run, 'chart')
+    assert analysis.status == {'chart': 'loaded', 'medians': 'cached', 'classified': 'cached', 'surveys': 'cached',
+                               'seniority': 'cached', 'regions': 'cached', 'compensation': 'cached'}, analysis.status
+
+    mapping = helper.economic_region_mapping
+    last = list(mapping)[-1]
+    original = mapping[last]
+    mapping[last] = original + ['boston']
+    try:
+        edited = timeit(analysis.run, 'classified')
+    finally:
+        mapping[last] = original
+    ran = sorted(name for name, status in analysis.status.items() if status == 'ran')
+    assert ran == ['classified', 'regions'], ran
+    record('stage_cache/warm', warm)
+    print(f'analysis DAG: cold {cold:.2f}s, cached {warm:.3f}s, '
+          f'after a region mapping edit {edited:.3f}s (reran {", ".join(ran)})')
+    analysis.clear()
+
+
+# Modules whose import must stay cheap: worker processes and CLI tools import them.
+light_modules = ['stylize_mpl', 'helper', 'mappings']
+heavy_modules = ['matplotlib', 'matplotlib.pyplot', 'seaborn']
+
+
+def import_times(modules):
+    """Cumulative import time in ms of each module, from `python -X importtime` in a fresh process."""
+    code = 'import sys; import ' + ', '.join(modules) + \
+        '; print(",".join(m for m in %r if m in sys.modules))' % heavy_modules
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.strip() in modules:
+            times[name.strip()] = int(cumulative) / 1000
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    return times, loaded
+
+
+def bench_pipeline(sizes=(1_000, 100_000, 1_000_000)):
+    """Time every stage of the analysis on synthetic surveys; sizes above 1M are generated in chunks."""
+    groups = ['1-50', '50-200', '200-1000', '1000-5000', '5000+']
+    size_column = 'Company Detail - Approximate Company Size'
+    for n_rows in sizes:
+        stages = dict.fromkeys(['generate', 'clean', 'seniority', 'regions', 'compensation', 'aggregate'], 0.0)
+        classifier = mappings.SeniorityClassifier()
+        resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+        medians = []
+        chunks = synthetic.iter_survey(n_rows, chunksize=1_000_000)
+        while True:
+            start = time.perf_counter()
+            raw = next(chunks, None)
+            if raw is None:
+                break
+            stages['generate'] += time.perf_counter() - start
+
+            def stage(name, func, *args):
+                start = time.perf_counter()
+                result = func(*args)
+                stages[name] += time.perf_counter() - start
+                return result
+
+            df = stage('clean', ingest.clean_survey, raw)
+            df['Seniority Level'] = stage('seniority', classifier.classify, df['Role / Title of current position'])
+            df['Economic Region'] = stage(
+                'regions', resolver.resolve, df['Where is the closest major city or hub?'])['Economic Region']
+            comp, _ = stage('compensation', helper.parse_compensation, df)
+            df[comp.columns] = comp
+            medians.append(stage('aggregate', lambda: df.groupby(
+                ['Seniority Level', size_column], observed=True)['Total Annual Compensation'].median()))
+
+        # charts are drawn from per-group medians, whose size does not grow with n_rows
+        grouped = medians[0].reset_index()
+        levels = list(grouped['Seniority Level'].unique())
+        wide = grouped.pivot(index='Seniority Level', columns=size_column, values='Total Annual Compensation')
+        wide = wide.reindex(columns=groups).reset_index()
+        stages['multi_dumbbell'] = timeit(
+            build, helper.make_multi_dumbbell, grouped, x_column='Total Annual Compensation',
+            y_column='Seniority Level', group_column=size_column, groups=groups,
+            colors=helper.colors, y_order=levels)
+        stages['dumbbell'] = timeit(
+            build, helper.make_dumbbell, wide, y_column='Seniority Level', x_cols=groups,
+            colors=helper.colors, labels=groups)
+
+        for name, seconds in stages.items():
+            record(f'pipeline/{name}/{n_rows}', seconds)
+        total = sum(seconds for name, seconds in stages.items() if name != 'generate')
+        print(f'pipeline, {n_rows:,} synthetic rows: {total:.2f}s ({n_rows / total:,.0f} rows/s); '
+              + ', '.join(f'{name} {seconds:.2f}s' for name, seconds in stages.items()))
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)['timings']
+
+
+def save_baselines(timings, path=BASELINES_PATH):
+    """Merge timings into the baselines file, keeping entries that were not re-run."""
+    merged = {**load_baselines(path), **timings}
+    with open(path, 'w') as f:
+        json.dump({
+            'machine': f'{platform.machine()} {platform.processor()} {os.cpu_count()} CPUs',
+            'python': platform.python_version(),
+            'timings': {name: round(seconds, 4) for name, seconds in sorted(merged.items())},
+        }, f, indent=1)
+
+
+def check_baselines(timings, baselines, tolerance, min_delta=0.05):
+    """
+    Print timings slower than tolerance x their baseline; returns their names.
+
+    Slowdowns of less than min_delta seconds are ignored: millisecond timings
+    vary by more than any sensible tolerance from run to run.
+    """
+    regressions = []
+    for name, seconds in sorted(timings.items()):
+        if name not in baselines:
+            continue
+        ratio = seconds / baselines[name]
+        if ratio > tolerance and seconds - baselines[name] > min_delta:
+            regressions.append(name)
+            print(f'REGRESSION {name}: {seconds:.4f}s vs baseline {baselines[name]:.4f}s ({ratio:.1f}x)')
+    checked = sum(name in baselines for name in timings)
+    print(f'{checked} timings checked against baselines, {len(regressions)} regressions')
+    return regressions
+
+
+def bench_import_time(repeat=3):
+    # best of a few fresh processes, as with timeit
+    runs = []
+    for _ in range(repeat):
+        times, loaded = import_times(light_modules)
+        assert not loaded, f'importing {light_modules} pulled in {loaded}'
+        runs.append(times)
+    for module in runs[0]:
+        ms = min(times[module] for times in runs)
+        record(f'import/{module}', ms / 1000)
+        print(f'import {module}: {ms:.0f} ms')
+
+
+benchmarks = {
+    'import_time': bench_import_time,
+    'seniority': bench_seniority,
+    'regions': bench_regions,
+    'compensation': bench_compensation,
+    'multi_dumbbell': bench_multi_dumbbell,
+    'dumbbell': bench_dumbbell,
+    'bootstrap': bench_bootstrap,
+    'cube': bench_cube,
+    'pipeline': bench_pipeline,
+    'beeswarm': bench_beeswarm,
+    'strip_chart': bench_strip_chart,
+    'instrument': bench_instrument,
+    'compact': bench_compact,
+    'stage_cache': bench_stage_cache,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=list(benchmarks), help='benchmarks to run; default all')
+    parser.add_argument('--rows', nargs='+', type=int, help='synthetic survey sizes for the pipeline benchmark')
+    parser.add_argument('--update-baselines', action='store_true', help='store these timings as the baselines')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='slowdown factor reported as a regression')
+    parser.add_argument('--min-delta', type=float, default=0.05, help='seconds of slowdown below which timings are not compared')
+    args = parser.parse_args()
+
+    for name in args.only or benchmarks:
+        if name == 'pipeline' and args.rows:
+            bench_pipeline(sizes=args.rows)
+        else:
+            benchmarks[name]()
+
+    if args.update_baselines:
+        save_baselines(results)
+        print(f'{len(results)} baselines written to {BASELINES_PATH}')
+    elif check_baselines(results, load_baselines(), args.tolerance, args.min_delta):
+        sys.exit(1)
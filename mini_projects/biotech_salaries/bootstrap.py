@@ -0,0 +1,144 @@
+"""Bootstrap confidence intervals for group medians, resampling every group at once.
+
+Groups with the same number of responses are stacked into one (groups, n) matrix.
+A single (groups, B, n) matrix of random indices then resamples all of them B
+times, and one vectorized median along the last axis yields every bootstrap
+median. The Python-level loop runs over distinct group sizes and memory-capped
+chunks of resamples, never over individual groups or resamples.
+
+Each row of the matrix is sorted first. The median of a resample is then the
+value at the median of its indices, so the median is taken over small integer
+indices with `np.partition` and only one or two values per resample are looked
+up. This gives the same numbers as `np.median` on the resampled values, without
+gathering them.
+
+Example usage:
+
+import bootstrap
+medians = bootstrap.bootstrap_medians(
+    df_us, value_column='Compensation - Annual Base Salary/Pay',
+    group_columns=['Seniority Level', 'Company Detail - Approximate Company Size'])
+f, ax = helper.make_multi_dumbbell(
+    medians, x_column='median', y_column='Seniority Level',
+    group_column='Company Detail - Approximate Company Size', ...,
+    ci_columns=('ci_low', 'ci_high'))
+"""
+import numpy as np
+import pandas as pd
+
+# Resamples are drawn in blocks of this many, each from its own seeded generator,
+# so the result does not depend on how max_bytes splits the work.
+BLOCK = 64
+
+# Bytes per resampled value: an int32 index and the copy np.partition sorts.
+_BYTES_PER_VALUE = 8
+
+
+def _chunk_medians(matrix, index):
+    """Medians of resamples of the sorted rows of matrix, given (rows, resamples, n) indices."""
+    n = matrix.shape[1]
+    middle = [(n - 1) // 2, n // 2]
+    rows = np.arange(len(matrix))[:, None]
+    index = np.partition(index, middle, axis=-1)
+    return (matrix[rows, index[..., middle[0]]] + matrix[rows, index[..., middle[1]]]) / 2
+
+
+def resample_medians(values, codes, n_groups, n_resamples=1000, seed=0, max_bytes=256 * 2**20):
+    """
+    Bootstrap medians of values grouped by integer codes.
+
+    values: 1-d float array, without NaNs.
+    codes: group number of each value, in range(n_groups).
+    max_bytes: approximate cap on the working memory of one chunk of resamples.
+        Chunks hold several blocks of every group of one size when they fit, then
+        single blocks of some of those groups, then part of one group's block.
+
+    Returns an (n_groups, n_resamples) array; rows of empty groups are NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes)
+    medians = np.full((n_groups, n_resamples), np.nan)
+
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    sorted_values = values[order]
+    n_blocks = -(-n_resamples // BLOCK)
+
+    for n in np.unique(sizes[sizes > 0]):
+        groups = np.flatnonzero(sizes == n)
+        # (groups, n) matrix of the responses in every group of this size, each row sorted
+        matrix = np.sort(sorted_values[starts[groups, None] + np.arange(n)], axis=1)
+        # resamples of one group that fit in max_bytes
+        per_chunk = max(1, max_bytes // (n * _BYTES_PER_VALUE))
+
+        if per_chunk >= len(groups) * BLOCK:
+            blocks_per_chunk = per_chunk // (len(groups) * BLOCK)
+            for first in range(0, n_blocks, blocks_per_chunk):
+                blocks = range(first, min(first + blocks_per_chunk, n_blocks))
+                index = np.concatenate([
+                    np.random.default_rng([seed, n, block]).integers(
+                        0, n, (len(groups), BLOCK, n), dtype=np.int32)
+                    for block in blocks
+                ], axis=1)
+                chunk = _chunk_medians(matrix, index)
+                start = first * BLOCK
+                stop = min(start + chunk.shape[1], n_resamples)
+                medians[groups, start:stop] = chunk[:, :stop - start]
+            continue
+
+        # A block's generator yields the same indices however its (groups, BLOCK, n)
+        # draw is split, as long as the pieces are drawn in order: groups first, then
+        # resamples. Trailing resamples past n_resamples are drawn and dropped.
+        group_step = max(1, per_chunk // BLOCK)
+        resample_step = min(BLOCK, per_chunk)
+        for block in range(n_blocks):
+            rng = np.random.default_rng([seed, n, block])
+            for first_group in range(0, len(groups), group_step):
+                part = slice(first_group, first_group + group_step)
+                for first in range(0, BLOCK, resample_step):
+                    count = min(resample_step, BLOCK - first)
+                    index = rng.integers(0, n, (len(groups[part]), count, n), dtype=np.int32)
+                    start = block * BLOCK + first
+                    stop = min(start + count, n_resamples)
+                    if start < stop:
+                        chunk = _chunk_medians(matrix[part], index)
+                        medians[groups[part], start:stop] = chunk[:, :stop - start]
+
+    return medians
+
+
+def bootstrap_medians(
+    df,
+    value_column,
+    group_columns,
+    n_resamples=1000,
+    confidence=0.95,
+    seed=0,
+    max_bytes=256 * 2**20):
+    """
+    Median of value_column per group, with a percentile bootstrap confidence interval.
+
+    Returns a DataFrame with the group columns, 'count', 'median', 'ci_low' and
+    'ci_high', one row per observed group, in the long format that
+    `make_multi_dumbbell` consumes. Rows with a missing value are ignored.
+    Results are reproducible for a given seed and n_resamples.
+    """
+    df = df.dropna(subset=[value_column])
+    grouped = df.groupby(list(group_columns), observed=True, sort=False)
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    keep = codes >= 0
+    values = df[value_column].to_numpy(dtype=float)[keep]
+    codes = codes[keep]
+    sizes = grouped.size()
+
+    medians = resample_medians(values, codes, len(sizes), n_resamples, seed, max_bytes)
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(medians, [tail, 1 - tail], axis=1)
+
+    result = sizes.index.to_frame(index=False)
+    result['count'] = sizes.to_numpy()
+    result['median'] = grouped[value_column].median().to_numpy()
+    result['ci_low'] = low
+    result['ci_high'] = high
+    return result
@@ -0,0 +1,347 @@
+"""Precomputed salary statistics for every slice of the survey.
+
+The cube groups the classified survey by every subset of its dimensions (seniority,
+economic region, company size and degree by default: 16 groupings, from the
+grand total to the full cross product) and stores count and quantiles of each
+compensation measure per cell. Slices and roll-ups are then dictionary and hash
+index lookups instead of a groupby over the raw responses.
+
+Quantiles do not roll up from finer cells, so for every grouping and measure the
+cube keeps the values of each cell, sorted. That costs memory: about 8 bytes per
+response, measure and grouping, 450 MB for a million responses with the defaults.
+
+Appended responses go to a second, pending layout of the same shape, so an append
+copies arrays the size of the pending values and of the cell list, never the size
+of the survey. The quantiles of the cells an append touches are recomputed from
+both layouts with a binary search per cell, and only their rows of the statistics
+change; tables are rebuilt from the statistics when next read. Once the pending
+values outgrow about 16 * sqrt(N), they are merged into the main layout, an O(N)
+step that is amortized over the appends that filled them.
+
+Example usage:
+
+import cube
+salary_cube = cube.SalaryCube(df_us)
+grouped_df = salary_cube.slice(['Seniority Level', 'Company Detail - Approximate Company Size'])
+salary_cube.cell({'Seniority Level': 'Scientist', 'Economic Region': 'U.S. West Coast'})
+salary_cube.append(df_new_responses)
+"""
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+dimensions = [
+    'Seniority Level',
+    'Economic Region',
+    'Company Detail - Approximate Company Size',
+    'What degrees do you have? ',
+]
+
+# Columns of helper.parse_compensation
+measures = [
+    'Annual Base Salary',
+    'Annual Target Bonus',
+    'Annual Equity',
+    'Total Annual Compensation',
+]
+
+default_quantiles = {'p25': 0.25, 'median': 0.5, 'p75': 0.75}
+
+
+class SalaryCube:
+    """
+    Count and quantiles of every measure, for every subset of the dimensions.
+
+    df: classified survey with the dimension and measure columns, e.g. after
+        `mappings.map_seniority_levels`, region resolution and
+        `helper.parse_compensation`.
+    quantiles: name -> q, as in `streaming.stream_quantiles`.
+    zero_is_missing: ignore zero amounts, like the notebook's `replace(0, np.nan)`
+        before taking medians of bonus and equity.
+
+    Rows with a missing value in a grouping's dimensions are left out of that
+    grouping's cells but still count towards coarser roll-ups.
+
+    Dimension values are stored as integer codes, and each grouping's cells are
+    identified by one int64 key combining the codes of its dimensions, so
+    grouping and locating the cells of new rows never hash strings.
+
+    `tables` maps each grouping to a DataFrame of its statistics, indexed by its
+    cells and built on first use after an append.
+    """
+
+    def __init__(self, df, dimensions=dimensions, measures=measures,
+                 quantiles=default_quantiles, zero_is_missing=False):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.quantiles = dict(quantiles)
+        self.zero_is_missing = zero_is_missing
+        self.levels = {d: pd.Index([], dtype=object) for d in self.dimensions}
+        self._columns = pd.MultiIndex.from_tuples(
+            [(m, name) for m in self.measures for name in ['count', *self.quantiles]])
+        codes, values = self._encode(df)
+        order = {m: np.argsort(values[m].to_numpy(), kind='stable') for m in self.measures}
+        # grouping -> sorted keys of its cells; (grouping, measure) -> (starts, values)
+        # of the values sorted at build or at the last merge, and of those appended since
+        self.cells = {}
+        self.sorted = {}
+        self.pending = {}
+        # grouping -> (measure, statistic) -> array over its cells
+        self.stats = {}
+        self._indexes = {}
+        self._tables = {}
+        for size in range(len(self.dimensions) + 1):
+            for dims in combinations(self.dimensions, size):
+                keys = self._cell_keys(codes, dims)
+                cells = self.cells[dims] = np.unique(keys[keys >= 0])
+                for m in self.measures:
+                    self.sorted[dims, m] = self._layout(keys, values[m].to_numpy(), order[m], cells)
+                    self.pending[dims, m] = (np.zeros(len(cells) + 1, dtype=np.int64), np.empty(0))
+                self.stats[dims] = self._aggregate(dims)
+
+    def _encode(self, df):
+        """Dimension codes (-1 for missing) and measure values of new rows, growing the levels."""
+        codes = {}
+        for d in self.dimensions:
+            column = df[d].astype(object)
+            unseen = pd.Index(column.dropna().unique()).difference(self.levels[d], sort=False)
+            self.levels[d] = self.levels[d].append(unseen)
+            codes[d] = self.levels[d].get_indexer(column)
+        values = df[self.measures].astype(float).reset_index(drop=True)
+        if self.zero_is_missing:
+            values = values.replace(0, np.nan)
+        return pd.DataFrame(codes), values
+
+    def _cell_keys(self, codes, dims, sizes=None):
+        """One int64 key per row for its cell in a grouping; -1 if a dimension is missing."""
+        sizes = sizes or {d: len(self.levels[d]) for d in dims}
+        key = np.zeros(len(codes[dims[0]]) if dims else len(codes), dtype=np.int64)
+        missing = np.zeros(len(key), dtype=bool)
+        for d in dims:
+            key = key * sizes[d] + np.asarray(codes[d])
+            missing |= np.asarray(codes[d]) < 0
+        key[missing] = -1
+        return key
+
+    def _split(self, keys, dims, sizes=None):
+        """Dimension codes of cell keys made by _cell_keys."""
+        sizes = sizes or {d: len(self.levels[d]) for d in dims}
+        codes = {}
+        for d in reversed(dims):
+            codes[d] = keys % sizes[d]
+            keys = keys // sizes[d]
+        return codes
+
+    def _labels(self, keys, dims):
+        """Index of dimension values for cell keys made by _cell_keys."""
+        codes = self._split(keys, dims)
+        arrays = [self.levels[d].take(codes[d]) for d in dims]
+        if len(dims) == 1:
+            return pd.Index(arrays[0], name=dims[0])
+        return pd.MultiIndex.from_arrays(arrays, names=list(dims))
+
+    def _layout(self, keys, values, order, cells):
+        """
+        A measure's values grouped by cell and sorted within each cell, with cell offsets.
+
+        order: row order of the measure by value, missing values last.
+
+        Rows are taken in the measure's sorted order, without missing keys or
+        values, then stably sorted by cell key, which leaves every cell's values
+        contiguous and sorted. Returns (starts, values): cell i holds
+        values[starts[i]:starts[i + 1]].
+        """
+        index = order[(keys[order] >= 0) & ~np.isnan(values[order])]
+        cell = keys[index]
+        # radix sort when the keys fit in 16 bits
+        small = len(cell) and cell.max() < 2**16
+        sort = np.argsort(cell.astype(np.uint16) if small else cell, kind='stable')
+        starts = np.append(np.searchsorted(cell[sort], cells), len(cell))
+        return starts, values[index[sort]]
+
+    def _aggregate(self, dims, rows=None):
+        """
+        Statistics of some cells of one grouping: (measure, statistic) -> array.
+
+        rows: positions of the cells in self.cells[dims]; all of them by default.
+
+        Every cell's values are contiguous and sorted in both layouts, so counts
+        are offset differences and quantiles are order statistics of two sorted
+        runs, for every cell at once.
+        """
+        if rows is None:
+            rows = np.arange(len(self.cells[dims]))
+        stats = {}
+        for m in self.measures:
+            starts, _ = self.sorted[dims, m]
+            pending_starts, _ = self.pending[dims, m]
+            count = (starts[rows + 1] - starts[rows]) + (pending_starts[rows + 1] - pending_starts[rows])
+            stats[(m, 'count')] = count
+            for name, q in self.quantiles.items():
+                position = q * np.maximum(count - 1, 0)
+                low = np.floor(position).astype(int)
+                high = np.ceil(position).astype(int)
+                low_value = self._order_statistic(dims, m, rows, low)
+                high_value = self._order_statistic(dims, m, rows, high)
+                if q == 0.5:
+                    value = (low_value + high_value) / 2
+                else:
+                    value = low_value + (high_value - low_value) * (position - low)
+                stats[(m, name)] = np.where(count > 0, value, np.nan)
+        return stats
+
+    def _order_statistic(self, dims, m, rows, k):
+        """
+        The k-th smallest value (from 0) of each cell in rows, over both layouts.
+
+        With a cell's sorted values a and pending values b, the k + 1 smallest are
+        a[:i] and b[:k + 1 - i] for the smallest i with a[i] >= b[k - i]; a binary
+        search finds i for every cell at once. Garbage for empty cells.
+        """
+        starts, values = self.sorted[dims, m]
+        pending_starts, pending = self.pending[dims, m]
+        a_start, a_count = starts[rows], starts[rows + 1] - starts[rows]
+        if not len(pending):
+            return _take(values, a_start + k)
+        b_start, b_count = pending_starts[rows], pending_starts[rows + 1] - pending_starts[rows]
+
+        low, high = np.maximum(k + 1 - b_count, 0), np.minimum(k + 1, a_count)
+        while (low < high).any():
+            middle = (low + high) // 2
+            active = low < high
+            after = active & (_take(values, a_start + middle) < _take(pending, b_start + k - middle))
+            low = np.where(after, middle + 1, low)
+            high = np.where(active & ~after, middle, high)
+
+        from_a = np.where(low > 0, _take(values, a_start + low - 1), -np.inf)
+        from_b = np.where(k - low >= 0, _take(pending, b_start + k - low), -np.inf)
+        return np.maximum(from_a, from_b)
+
+    @property
+    def tables(self):
+        """grouping -> statistics table, indexed by its cells."""
+        return {dims: self._table(dims) for dims in self.stats}
+
+    def _table(self, dims):
+        if dims not in self._tables:
+            if dims and dims not in self._indexes:
+                self._indexes[dims] = self._labels(self.cells[dims], dims)
+            table = pd.DataFrame(dict(enumerate(self.stats[dims].values())), index=self._indexes.get(dims))
+            table.columns = self._columns
+            self._tables[dims] = table
+        return self._tables[dims]
+
+    def _grouping(self, dims):
+        """Canonical key of a grouping: its dimensions in cube order."""
+        unknown = set(dims) - set(self.dimensions)
+        if unknown:
+            raise KeyError(f'not a cube dimension: {sorted(unknown)}')
+        return tuple(d for d in self.dimensions if d in dims)
+
+    def cell(self, filters):
+        """
+        Statistics of one slice, as a Series indexed by (measure, statistic).
+
+        filters: dimension -> value; dimensions left out are rolled up.
+        """
+        dims = self._grouping(filters)
+        table = self._table(dims)
+        if not dims:
+            return table.iloc[0]
+        key = tuple(filters[d] for d in dims)
+        return table.loc[key if len(dims) > 1 else key[0], :]
+
+    def slice(self, dims, measure='Annual Base Salary'):
+        """
+        Every cell of a grouping for one measure, in long format.
+
+        Returns a DataFrame with the dims, 'count' and one column per quantile,
+        like `streaming.stream_quantiles`, ready for `make_multi_dumbbell`.
+        """
+        table = self._table(self._grouping(dims))[measure]
+        return table.reset_index(drop=not dims)
+
+    def append(self, df):
+        """
+        Add new responses and update the cells they fall in; returns the number of cells updated.
+
+        Only the new rows are sorted. Each measure's new values are merged into
+        the pending layout, and only the statistics of the cells they fall in are
+        recomputed. See the module docstring for the cost.
+        """
+        if not len(df):
+            return 0
+        sizes = {d: len(self.levels[d]) for d in self.dimensions}
+        codes, values = self._encode(df)
+        grown = [d for d in self.dimensions if len(self.levels[d]) != sizes[d]]
+        updated = 0
+        for dims in self.stats:
+            cells = self.cells[dims]
+            if any(d in dims for d in grown):
+                # new levels take the next codes, so re-keyed cells stay in order
+                cells = self._cell_keys(self._split(cells, dims, sizes), dims)
+            keys = self._cell_keys(codes, dims)
+            touched = np.unique(keys[keys >= 0])
+            new_cells = np.setdiff1d(touched, cells, assume_unique=True)
+            positions = np.searchsorted(cells, new_cells)
+            cells = self.cells[dims] = np.insert(cells, positions, new_cells)
+            for m in self.measures:
+                # new cells start out empty, where the next cell starts
+                starts, sorted_values = self.sorted[dims, m]
+                starts = np.insert(starts, positions, starts[positions])
+                pending_starts, pending = self.pending[dims, m]
+                pending_starts = np.insert(pending_starts, positions, pending_starts[positions])
+                pending_starts, pending = self._insert(
+                    pending_starts, pending, cells, keys, values[m].to_numpy())
+                if len(pending) > self._pending_limit(len(sorted_values)):
+                    pending_keys = np.repeat(cells, np.diff(pending_starts))
+                    starts, sorted_values = self._insert(starts, sorted_values, cells, pending_keys, pending)
+                    pending_starts, pending = np.zeros_like(pending_starts), np.empty(0)
+                self.sorted[dims, m] = starts, sorted_values
+                self.pending[dims, m] = pending_starts, pending
+
+            stats = self.stats[dims]
+            if len(new_cells):
+                for column, array in stats.items():
+                    stats[column] = np.insert(array, positions, 0)
+                self._indexes.pop(dims, None)
+            rows = np.searchsorted(cells, touched)
+            for column, array in self._aggregate(dims, rows).items():
+                stats[column][rows] = array
+            self._tables.pop(dims, None)
+            updated += len(touched)
+        return updated
+
+    def _pending_limit(self, n_sorted):
+        """Pending values a measure's layout holds before they are merged into the sorted ones."""
+        return max(4096, 16 * int(np.sqrt(n_sorted)))
+
+    def _insert(self, starts, sorted_values, cells, keys, values):
+        """Merge new rows' values into a measure's layout; returns the new (starts, values)."""
+        rows = (keys >= 0) & ~np.isnan(values)
+        keys, values = keys[rows], values[rows]
+        order = np.lexsort((values, keys))
+        keys, values = keys[order], values[order]
+        cell = np.searchsorted(cells, keys)
+
+        # binary search of every new value within its cell at once; each goes
+        # after the equal and smaller values already there
+        low, high = starts[cell], starts[cell + 1]
+        while (low < high).any():
+            middle = (low + high) // 2
+            after = (low < high) & (sorted_values[np.minimum(middle, len(sorted_values) - 1)] <= values)
+            before = (low < high) & ~after
+            low = np.where(after, middle + 1, low)
+            high = np.where(before, middle, high)
+
+        sorted_values = np.insert(sorted_values, low, values)
+        starts = starts + np.append(0, np.cumsum(np.bincount(cell, minlength=len(cells))))
+        return starts, sorted_values
+
+
+def _take(values, index):
+    """values[index], with out-of-range positions clipped; NaN when values is empty."""
+    if not len(values):
+        return np.full(np.shape(index), np.nan)
+    return values.take(index, mode='clip')
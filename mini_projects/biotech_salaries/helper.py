@@ -1,7 +1,13 @@
+import hashlib
+import re
 
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+
+import instrument
+
+# matplotlib is imported inside the plotting functions, so importing this module
+# for its mappings and parsers does not pay for pyplot.
 
 geographical_mapping = {
     # Within USA
@@ -117,6 +123,305 @@ economic_region_mapping = {
     'n/a': ['remote'],
 }
 
+# Unescaped regex metacharacters; keywords without any are matched as plain substrings.
+_REGEX_META = re.compile(r'(?<!\\)[.^$*+?{}\[\]|()]|\\[a-zA-Z]')
+
+
+def _as_literal(keyword):
+    """Return the keyword as a lowercase literal string, or None if it needs a regex."""
+    if _REGEX_META.search(keyword):
+        return None
+    return re.sub(r'\\(.)', r'\1', keyword).lower()
+
+
+class _AhoCorasick:
+    """Multi-pattern substring matcher; each pattern carries a bitmask payload."""
+
+    def __init__(self, patterns):
+        # patterns: dict of literal -> bitmask
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [0]
+        for literal, mask in patterns.items():
+            state = 0
+            for char in literal:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(0)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.out[state] |= mask
+
+        # breadth-first pass to set failure links and merge outputs along them
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.out[child] |= self.out[self.fail[child]]
+                queue.append(child)
+
+    def search(self, text):
+        """OR together the payloads of every pattern occurring in text."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        found = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found |= out[state]
+        return found
+
+
+class RegionResolver:
+    """
+    Assign regions to free-text locations using one or more keyword mappings at once.
+
+    Every keyword of every mapping is compiled into a single Aho-Corasick automaton,
+    so each location is scanned once no matter how many regions there are. Keywords
+    that are real regexes, e.g. r'\\bma\\b' or 'cambridge,? ma', fall back to one
+    combined case-insensitive regex per region. Each distinct location string is
+    resolved once and the result is broadcast back to the column.
+
+    When a location matches several regions of the same mapping, the region listed
+    *last* in the mapping wins. This reproduces the notebook loop, where every
+    region's `str.contains` scan overwrote the ones before it. Pass `priority` to
+    order the regions explicitly; it lists regions from highest to lowest priority.
+
+    Example usage:
+
+    resolver = RegionResolver({
+        'Economic Region': economic_region_mapping,
+        'Metro Area': geographical_mapping,
+    })
+    regions = resolver.resolve(df['Where is the closest major city or hub?'])
+    df['Economic Region'] = regions['Economic Region']
+    """
+
+    def __init__(self, mappings, priority=None):
+        """
+        mappings (dict): output column name -> {region: [keywords]} mapping.
+        priority (dict, optional): output column name -> regions, highest priority first.
+            Defaults to the reverse of each mapping's key order.
+        """
+        priority = priority or {}
+        self.columns = list(mappings)
+        self.categories = {}
+        # per column: (bit, region) pairs, highest priority first
+        self._ranked = {}
+
+        literals = {}
+        regex_keywords = {}
+        bit = 0
+        for column, mapping in mappings.items():
+            self.categories[column] = list(mapping)
+            region_bits = {}
+            for region, keywords in mapping.items():
+                region_bits[region] = 1 << bit
+                for keyword in keywords:
+                    literal = _as_literal(keyword)
+                    if literal is None:
+                        regex_keywords.setdefault(1 << bit, []).append(keyword)
+                    else:
+                        literals[literal] = literals.get(literal, 0) | (1 << bit)
+                bit += 1
+            order = priority.get(column, list(reversed(mapping)))
+            self._ranked[column] = [(region_bits[region], region) for region in order]
+
+        self._automaton = _AhoCorasick(literals)
+        self._regexes = [
+            (mask, re.compile('|'.join(keywords), re.IGNORECASE))
+            for mask, keywords in regex_keywords.items()
+        ]
+
+    def match_mask(self, location):
+        """Bitmask of every (column, region) pair whose keywords occur in location."""
+        mask = self._automaton.search(location.lower())
+        for region_mask, regex in self._regexes:
+            if not mask & region_mask and regex.search(location):
+                mask |= region_mask
+        return mask
+
+    def resolve_one(self, location):
+        """Return {column: region or None} for a single location string."""
+        mask = self.match_mask(location)
+        return {
+            column: next((region for bit, region in ranked if mask & bit), None)
+            for column, ranked in self._ranked.items()
+        }
+
+    @instrument.stage('regions', rows_arg=1)
+    def resolve(self, locations):
+        """
+        Resolve a Series of locations.
+
+        Returns a DataFrame with one categorical column per mapping, aligned with
+        `locations`. Categories follow the mapping's key order; locations without a
+        match (or missing) are NaN.
+        """
+        codes, uniques = pd.Series(locations).factorize()
+        resolved = [self.resolve_one(str(location)) for location in uniques]
+
+        result = {}
+        for column in self.columns:
+            categories = self.categories[column]
+            lookup = {region: i for i, region in enumerate(categories)}
+            unique_codes = np.array(
+                [lookup.get(regions[column], -1) for regions in resolved] + [-1],
+                dtype=np.int32)
+            result[column] = pd.Categorical.from_codes(
+                unique_codes[codes], categories=categories)
+        return pd.DataFrame(result, index=locations.index)
+
+
+def convert_to_float(value, base_salary_col):
+    """
+    Parse one free-text bonus or equity value into dollars. Unparseable text gives 0.
+
+    This is the row-wise reference for `parse_compensation`.
+
+    Test cases:
+        - $15k
+        - 200k
+        - $40K
+        - 8.5k
+        - 10% of salary
+        - 15.25% usually
+        - 17.5
+        - 18,750
+        - depends, 10-15%
+        - 10,000 in RSU
+        - Not Applicable/None
+    """
+    if ',' in value:
+        value = value.replace(',','')
+    if '$' in value:
+        value = value.replace('$','')
+    if '-' in value:
+        # e.g., '15000-20000'
+        value = value.split('-')[-1]
+
+    # text could be '12.50%', '20k', 'None/NA', '10'.
+    # In the last case we assume it's a percentage.
+    try:
+        if 'None' in value or 'Applicable' in value:
+            return 0
+        elif '%' in value:
+            # e.g., '15.50%'
+            match = re.search(r"\d{1,2}(\.\d+)?%", value)
+            if match:
+                percentage = match.group()
+            return base_salary_col * (float(percentage.strip('%')) / 100)
+        elif 'k' in value.lower():
+            # e.g., '15k', '$40K', '8.5k'
+            match = re.search(r"(\d+(?:\.\d+)?)\s*k", value, re.IGNORECASE)
+            return float(match.group(1))*1000
+        elif 'rsu' in value.lower():
+            match = re.search(r"\d+",value)
+            return float(match.group())
+        elif float(value)<50:
+            # assume they have written two digits with no percentage sign
+            return base_salary_col * (float(value)/100)
+        else:
+            return float(value)
+    except Exception as error:
+        # debug error if needed
+        # print(error)
+        return 0
+
+
+def parse_amounts(values, base_salary):
+    """
+    Vectorized `convert_to_float` over a whole column.
+
+    The free text repeats heavily, so each distinct string is parsed once with
+    pandas string methods into either a fixed dollar amount or a percentage of
+    base salary, and the results are broadcast back to the rows.
+
+    Parameters:
+    values (Series): free-text bonus or equity values.
+    base_salary (Series): base salary of the same rows, used to resolve percentages.
+
+    Returns:
+    (Series, Series): the dollar amounts, and a boolean mask of the values that
+        could not be parsed. Unparsed values are 0 in the amounts, as before.
+    """
+    codes, uniques = values.factorize()
+    text = pd.Series(uniques, dtype='string')
+
+    # '$18,750' -> '18750'; 'depends, 10-15%' -> '15%'
+    text = text.str.replace(',', '', regex=False).str.replace('$', '', regex=False)
+    text = text.str.rsplit('-', n=1).str[-1]
+
+    is_none = text.str.contains('None|Applicable', regex=True)
+    is_percent = ~is_none & text.str.contains('%', regex=False)
+    is_thousands = ~is_none & ~is_percent & text.str.contains('k', case=False, regex=False)
+    is_rsu = ~is_none & ~is_percent & ~is_thousands & text.str.contains('rsu', case=False, regex=False)
+
+    percent = text.str.extract(r'(\d{1,2}(?:\.\d+)?)%', expand=False).astype(float)
+    # any value with a 'k' and no '<amount>k' in it, like 'Idk', is left unparsed
+    thousands = text.str.extract(r'(?i)(\d+(?:\.\d+)?)\s*k', expand=False).astype(float) * 1000
+    rsu = text.str.extract(r'(\d+)', expand=False).astype(float)
+    number = pd.to_numeric(text.str.strip(), errors='coerce').astype(float)
+
+    # Every distinct value is either a fixed amount or a percentage of base salary.
+    # Bare numbers below 50 are taken to be percentages written without a '%'.
+    is_number_percent = ~(is_none | is_percent | is_thousands | is_rsu) & (number < 50)
+    fixed = np.select(
+        [is_none, is_percent | is_number_percent, is_thousands, is_rsu],
+        [0.0, 0.0, thousands, rsu],
+        default=number)
+    fraction = np.select([is_percent, is_number_percent], [percent / 100, number / 100], default=0.0)
+
+    # missing values (code -1) read the trailing NaN slot and count as unparsed
+    fixed = np.append(fixed, np.nan)[codes]
+    fraction = np.append(fraction, 0.0)[codes]
+    amounts = pd.Series(fixed + fraction * base_salary.to_numpy(dtype=float), index=values.index)
+
+    unparsed = amounts.isna()
+    return amounts.fillna(0.0), unparsed
+
+
+@instrument.stage('compensation')
+def parse_compensation(
+    df,
+    base_column='Compensation - Annual Base Salary/Pay',
+    bonus_column='Compensation - Annual Target Bonus ($)',
+    equity_column='Compensation - Annual Equity/Stock Option'):
+    """
+    Parse the free-text bonus and equity columns and total them with base salary.
+
+    Example usage:
+
+    comp, unparsed = parse_compensation(df)
+    df[comp.columns] = comp
+
+    Returns:
+    (DataFrame, dict): columns 'Annual Base Salary', 'Annual Target Bonus',
+        'Annual Equity' and 'Total Annual Compensation' aligned with df, and the
+        number of bonus and equity values that could not be parsed (counted as 0).
+    """
+    base = df[base_column].astype(float)
+    bonus, bonus_unparsed = parse_amounts(df[bonus_column], base)
+    equity, equity_unparsed = parse_amounts(df[equity_column], base)
+
+    comp = pd.DataFrame({
+        'Annual Base Salary': base,
+        'Annual Target Bonus': bonus,
+        'Annual Equity': equity,
+        'Total Annual Compensation': base + bonus + equity,
+    })
+    unparsed = {
+        bonus_column: int(bonus_unparsed.sum()),
+        equity_column: int(equity_unparsed.sum()),
+    }
+    return comp, unparsed
+
+
 colors = [
 "#000000",
 "#ffcd19",
@@ -130,6 +435,7 @@ colors = [
 "#D1B07C",
 ]
 
+@instrument.stage('make_multi_dumbbell')
 def make_multi_dumbbell(
     df, 
     x_column, 
@@ -138,7 +444,8 @@ def make_multi_dumbbell(
     groups, 
     colors, 
     y_order,
-    marker = 'o'):
+    marker = 'o',
+    ci_columns = None):
     """
     df: contains x_column, group_column, y_column
         df has been grouped using `groupby([y_column,group_column])[[x_column]].aggregate()`
@@ -148,17 +455,38 @@ def make_multi_dumbbell(
         seaborn.scatterplot. See https://matplotlib.org/stable/api/markers_api.html.
         and https://matplotlib.org/stable/gallery/lines_bars_and_markers/marker_reference.html#sphx-glr-gallery-lines-bars-and-markers-marker-reference-py.
         If a list is given, different markers may be used for different subgroups displayed.
+    ci_columns (tuple[str, str]): optional (low, high) columns of df, drawn as
+        horizontal error bars in each group's color, e.g. the 'ci_low' and 'ci_high'
+        columns from `bootstrap.bootstrap_medians`.
+
+    The chart is pixel-identical to one drawn with a `sns.scatterplot` and an `ax.plot`
+    per row, but the data is split with a single groupby and every connecting line
+    goes into one LineCollection, so the artist count no longer grows with y_order.
+    Each group keeps its own single-color scatter collection: Agg rasterizes
+    multi-color collections through a different code path, which moves marker
+    edges by a fraction of a pixel.
     """
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from matplotlib.markers import MarkerStyle
+
     assert len(colors) >= len(groups), "There must be more color options than unique group values."
     
     # Initialize the matplotlib figure
     f, ax = plt.subplots(figsize=(8, 5))
 
-    # colors = ['skyblue','orange','magenta','red','green','blue']
-    # colors = sm.color_palette('thermoneter')
     if isinstance(marker, str):
         marker = [marker] * len(groups)
-        
+
+    # Register the rows in y_order so points and lines agree on positions, and
+    # draw the first row at the top, as seaborn does for a categorical y axis.
+    y_order = list(y_order)
+    ax.yaxis.update_units(y_order)
+    ax.yaxis.set_inverted(True)
+
+    points = dict(list(df.dropna(subset=[x_column, y_column]).groupby(group_column, observed=True, sort=False)))
+
     for group, color, mark in zip(groups, colors, marker):
         if mark == '|':
             linewidth=3
@@ -166,32 +494,48 @@ def make_multi_dumbbell(
         else:
             linewidth=1
             zorder = 2
-            
-        # Plot the two values
-        sns.scatterplot(
-            data=df[df[group_column]==group], 
-            x=x_column, 
-            y=y_column , 
-            color=color,
-            # alpha=0.75,
-            s=100, 
-            # edgewidth=1,
-            # edgecolor=None,
-            label=group,
-            marker=mark,
-            linewidth=linewidth,
-            zorder = zorder,
-            )
+        style = dict(s=100, marker=mark, linewidth=linewidth, zorder=zorder)
+        if MarkerStyle(mark).is_filled():
+            style['edgecolor'] = 'w'
+
+        rows = points.get(group, df.iloc[:0])
+        ax.scatter(rows[x_column], rows[y_column], color=color, label=group, **style)
+        if ci_columns is not None:
+            low, high = ci_columns
+            draw_error_bars(ax, rows[x_column], rows[y_column], rows[low], rows[high], color)
 
     # Draw horizontal lines
-    for y_row, y_pos in zip(y_order, np.arange(len(y_order))):
-        leftmost = np.min(df[df[y_column]==y_row][x_column])
-        rightmost = np.max(df[df[y_column]==y_row][x_column])
-        ax.plot([leftmost, rightmost], [y_pos, y_pos], color='#777777', zorder=1)
+    extents = df.groupby(y_column, observed=True)[x_column].agg(['min', 'max']).reindex(y_order)
+    y_pos = np.arange(len(y_order))
+    segments = np.stack([
+        np.column_stack([extents['min'], y_pos]),
+        np.column_stack([extents['max'], y_pos]),
+    ], axis=1)
+    ax.add_collection(LineCollection(
+        segments,
+        colors='#777777',
+        linewidths=mpl.rcParams['lines.linewidth'],
+        capstyle=mpl.rcParams['lines.solid_capstyle'],
+        joinstyle=mpl.rcParams['lines.solid_joinstyle'],
+        zorder=1,
+        ))
+
+    ax.set_xlabel(x_column)
+    ax.set_ylabel(y_column)
+    ax.legend()
 
     return f, ax
 
-def make_dumbbell(df, y_column, x_cols, colors, labels):
+def draw_error_bars(ax, x, y, low, high, color):
+    """Horizontal error bars from low to high around each point, below dumbbell markers."""
+    x, low, high = (np.asarray(v, dtype=float) for v in (x, low, high))
+    ax.errorbar(
+        x, y, xerr=[x - low, high - x], fmt='none', ecolor=color,
+        elinewidth=1.5, capsize=3, alpha=0.7, zorder=5)
+
+
+@instrument.stage('make_dumbbell')
+def make_dumbbell(df, y_column, x_cols, colors, labels, ci_cols=None):
     """Modified dumbbell chart. Kinds of like string lights?
     
     df is expected to be sorted in the desired order, with index reset.
@@ -207,23 +551,261 @@ def make_dumbbell(df, y_column, x_cols, colors, labels):
         colors=['skyblue','orange'],
         labels=['Base Annual Compensation','Total Annual Compensation']
         )
+
+    Raw arrays work too: pass a (rows, points) array of x values as df and an
+    array of row labels or positions as y_column; x_cols is then ignored.
+
+    f, ax = make_dumbbell(x_values, y_column=levels, x_cols=None, colors=colors, labels=labels)
+
+    ci_cols adds horizontal error bars: for a DataFrame, one (low, high) pair of
+    columns per entry in x_cols; for an array, a (low, high) pair of arrays shaped
+    like df. Pivot the output of `bootstrap.bootstrap_medians` to get them.
+
+    Every connector is drawn in a single LineCollection from a row-wise NumPy
+    min/max, so the number of artists does not grow with the number of rows.
     """
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    if isinstance(df, np.ndarray):
+        x_values = df.astype(float)
+        y_values = np.asarray(y_column)
+        x_label = y_label = None
+        if ci_cols is not None:
+            ci_low, ci_high = (np.asarray(v, dtype=float) for v in ci_cols)
+    else:
+        x_values = df[x_cols].to_numpy(dtype=float)
+        y_values = df[y_column].to_numpy()
+        x_label, y_label = x_cols[0], y_column
+        if ci_cols is not None:
+            ci_low = df[[low for low, _ in ci_cols]].to_numpy(dtype=float)
+            ci_high = df[[high for _, high in ci_cols]].to_numpy(dtype=float)
+
     f, ax = plt.subplots(figsize=(8, 5))
 
+    # Text labels go on a categorical axis, first row at the top, as seaborn does.
+    if not np.issubdtype(y_values.dtype, np.number):
+        ax.yaxis.update_units(pd.unique(y_values))
+        ax.yaxis.set_inverted(True)
+    y_pos = np.asarray(ax.yaxis.convert_units(y_values), dtype=float)
+
     # Plot the "points"
-    for x_col, color, label in zip(x_cols, colors, labels):
-        sns.scatterplot(
-            data=df, x=x_col, y=y_column , color=color, s=100, label=label, zorder=10)
+    for points, color, label in zip(x_values.T, colors, labels):
+        ax.scatter(
+            points, y_pos, color=color, s=100, label=label, zorder=10,
+            edgecolor='w', linewidth=0.08 * np.sqrt(100))
+    if ci_cols is not None:
+        for i, color in enumerate(colors[:x_values.shape[1]]):
+            draw_error_bars(ax, x_values[:, i], y_pos, ci_low[:, i], ci_high[:, i], color)
 
     # Draw lines
-    for i in range(df.shape[0]):
-        left_point = min(df[x_cols].iloc[i])
-        right_point = max(df[x_cols].iloc[i])
-        ax.plot(
-            [left_point, right_point], 
-            [df[y_column][i], df[y_column][i]], 
-            color='gray',
-            zorder=1)
+    segments = np.stack([
+        np.column_stack([np.nanmin(x_values, axis=1), y_pos]),
+        np.column_stack([np.nanmax(x_values, axis=1), y_pos]),
+    ], axis=1)
+    ax.add_collection(LineCollection(
+        segments,
+        colors='gray',
+        linewidths=mpl.rcParams['lines.linewidth'],
+        capstyle=mpl.rcParams['lines.solid_capstyle'],
+        joinstyle=mpl.rcParams['lines.solid_joinstyle'],
+        zorder=1,
+        ))
+
+    if x_label is not None:
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+    ax.legend()
 
     return f, ax
-        
+
+# Layouts computed by beeswarm_offsets, most recent last.
+_beeswarm_cache = {}
+_BEESWARM_CACHE_SIZE = 16
+
+
+@instrument.stage('beeswarm_offsets')
+def beeswarm_offsets(
+    values,
+    categories=None,
+    order=None,
+    size=4,
+    figsize=(15, 8),
+    dpi=100,
+    value_range=None,
+    width=0.8):
+    """Beeswarm layout: offsets from each category's row so that markers do not overlap.
+
+    Example usage, for the notebook's horizontal swarm of salaries per seniority level:
+
+    offsets = beeswarm_offsets(df[x_column], df[y_column], order=median_values[y_column])
+    rows = pd.Index(median_values[y_column]).get_indexer(df[y_column])
+    plt.figure(figsize=(15, 8))
+    plt.scatter(df[x_column], rows + offsets, s=4**2)
+    plt.gca().invert_yaxis()
+
+    values: positions along the value axis (x).
+    categories: row of each value; None puts every value in one row.
+    order: categories, top row first, as y positions 0, 1, ...; values in other
+        categories get NaN offsets. Defaults to categories in order of appearance.
+    size: marker diameter in points, as in `sns.swarmplot` (scatter s=size**2).
+    figsize, dpi: the figure the swarm is drawn in, with the default subplot
+        margins, which set how many pixels a data unit spans.
+    value_range: (min, max) of the value axis; defaults to the data range with
+        matplotlib's 5% margins.
+    width: share of the row spacing the swarm may fill, as in `sns.swarmplot`.
+
+    Points are placed in order of value into lanes one marker diameter apart,
+    starting at the center lane and alternating outwards. A point takes the first
+    lane whose previous point is at least a diameter to its left, so no two
+    markers overlap. That is a single pass over the sorted values, checking only
+    the last point of each lane, where seaborn compares every point against its
+    placed neighbours. Points that find no free lane within `width` go to the
+    lane that has been free longest, overlapping rather than being dropped.
+
+    Layouts are cached on the data and all the arguments, so redrawing a chart
+    does not lay it out again.
+    """
+    values = np.asarray(values, dtype=float)
+    if categories is None:
+        codes = np.zeros(len(values), dtype=np.int64)
+        n_rows = 1
+    else:
+        if order is None:
+            order = pd.unique(np.asarray(categories, dtype=object))
+        codes = pd.Index(order).get_indexer(np.asarray(categories, dtype=object))
+        n_rows = len(order)
+
+    digest = hashlib.sha1(values.tobytes())
+    digest.update(codes.astype(np.int64).tobytes())
+    key = (digest.hexdigest(), n_rows, size, tuple(figsize), dpi,
+           None if value_range is None else tuple(value_range), width)
+    if key in _beeswarm_cache:
+        _beeswarm_cache[key] = _beeswarm_cache.pop(key)
+        return _beeswarm_cache[key].copy()
+
+    import matplotlib as mpl
+
+    # axes size in pixels, with the default subplot margins
+    params = mpl.rcParams
+    axes_width = figsize[0] * dpi * (params['figure.subplot.right'] - params['figure.subplot.left'])
+    axes_height = figsize[1] * dpi * (params['figure.subplot.top'] - params['figure.subplot.bottom'])
+
+    valid = (codes >= 0) & ~np.isnan(values)
+    if value_range is None:
+        low, high = (values[valid].min(), values[valid].max()) if valid.any() else (0, 1)
+        margin = (high - low) * mpl.rcParams['axes.xmargin']
+        value_range = (low - margin, high + margin)
+    span = (value_range[1] - value_range[0]) or 1.0
+
+    diameter = size * dpi / 72
+    x = values * axes_width / span  # in pixels
+    # row spacing in pixels: rows sit at 0 .. n_rows - 1 on an axis from -0.5 to n_rows - 0.5
+    lane = diameter / (axes_height / n_rows)  # lane spacing in row units
+    half_lanes = max(0, int((width / 2) // lane))
+    lanes = [0] + [side * k for k in range(1, half_lanes + 1) for side in (1, -1)]
+
+    offsets = np.full(len(values), np.nan)
+    rows = np.flatnonzero(valid)
+    rows = rows[np.lexsort((x[rows], codes[rows]))]
+    boundaries = np.flatnonzero(np.diff(codes[rows])) + 1
+    for group in np.split(rows, boundaries):
+        last = [-np.inf] * len(lanes)
+        placed = np.empty(len(group))
+        for i, position in enumerate(x[group].tolist()):
+            for j in range(len(lanes)):
+                if last[j] <= position - diameter:
+                    break
+            else:
+                j = last.index(min(last))
+            last[j] = position
+            placed[i] = lanes[j]
+        offsets[group] = placed * lane
+
+    _beeswarm_cache[key] = offsets
+    while len(_beeswarm_cache) > _BEESWARM_CACHE_SIZE:
+        del _beeswarm_cache[next(iter(_beeswarm_cache))]
+    return offsets.copy()
+
+
+@instrument.stage('make_strip_chart')
+def make_strip_chart(
+    df,
+    x_column,
+    y_column,
+    y_order,
+    hover_column='Role / Title of current position',
+    colors=None,
+    jitter=0.0,
+    max_points=None,
+    seed=0,
+    height=800):
+    """Interactive strip chart: one row of points per value of y_column, with hover text.
+
+    Example usage:
+
+    fig = make_strip_chart(
+        df,
+        x_column='Compensation - Annual Base Salary/Pay',
+        y_column='Seniority Level',
+        y_order=median_values['Seniority Level'],
+        )
+    fig.write_html('strip.html', include_plotlyjs='cdn')
+
+    All points go into a single WebGL (`Scattergl`) trace. Rows are integer y
+    codes labelled through the axis ticks, colors are a discrete colorscale over
+    those codes, and each point only carries its hover text as customdata, so the
+    figure's size grows with the number of points rather than with points times
+    columns, and the browser draws one trace.
+
+    y_order (list-like): values of y_column, top row first. Rows with other values are dropped.
+    colors (list-like): one color per row; defaults to Plotly's qualitative palette.
+    jitter (float): spread each row's points over y +/- jitter, so dense rows stay readable.
+    max_points (int): if given, keep about this many points, sampled in proportion
+        to each row's size with seed; each row keeps its minimum and maximum.
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+
+    y_order = list(y_order)
+    if colors is None:
+        colors = qualitative.Plotly
+    colors = [colors[i % len(colors)] for i in range(len(y_order))]
+
+    codes = pd.Index(y_order).get_indexer(df[y_column])
+    x = df[x_column].to_numpy(dtype=float)
+    keep = (codes >= 0) & ~np.isnan(x)
+
+    rng = np.random.default_rng(seed)
+    if max_points is not None and keep.sum() > max_points:
+        sampled = rng.random(len(x)) < max_points / keep.sum()
+        kept = np.flatnonzero(keep)
+        rows = pd.Series(x[kept], index=kept).groupby(codes[kept])
+        sampled[rows.idxmin()] = True
+        sampled[rows.idxmax()] = True
+        keep &= sampled
+
+    codes, x = codes[keep], x[keep]
+    y = codes + rng.uniform(-jitter, jitter, len(codes)) if jitter else codes
+    hover = df[hover_column].to_numpy(dtype=object)[keep]
+
+    # step colorscale: code i maps to colors[i]
+    n = len(y_order)
+    colorscale = [[edge / n, color] for i, color in enumerate(colors) for edge in (i, i + 1)]
+
+    fig = go.Figure(go.Scattergl(
+        x=x,
+        y=y,
+        mode='markers',
+        customdata=hover,
+        marker=dict(color=codes, colorscale=colorscale, cmin=-0.5, cmax=n - 0.5),
+        hovertemplate='%{customdata}<br>%{x:$,.0f}<extra></extra>',
+        showlegend=False,
+        ))
+    fig.update_yaxes(
+        tickmode='array', tickvals=list(range(n)), ticktext=y_order,
+        autorange='reversed', title_text=y_column)
+    fig.update_xaxes(title_text=x_column)
+    fig.update_layout(height=height)
+    return fig
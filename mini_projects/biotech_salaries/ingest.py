@@ -0,0 +1,190 @@
+"""Load the yearly r/biotech salary survey CSVs into one cleaned, harmonized schema.
+
+Cleaning runs once per source file. The result is pickled under `.cache/`, keyed
+on the SHA-256 of the CSV bytes, of the cleanup code and of `SCHEMA_VERSION`, so
+later loads of an unchanged file skip parsing and cleanup entirely, and editing
+`clean_survey` or its column lists invalidates them.
+
+Example usage:
+
+import ingest
+df = ingest.load_survey(2024)
+df_all = ingest.load_surveys([2022, 2023, 2024])
+df_all, memory = ingest.compact_frame(df_all)
+"""
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+
+import instrument
+from hashing import file_hash
+
+# Bump whenever the schema changes in a way the cleanup code does not show, to invalidate caches.
+SCHEMA_VERSION = 2
+
+CACHE_DIR = '.cache'
+
+survey_paths = {
+    2022: 'r_biotech salary and company survey - 2022.csv',
+    2023: 'r_biotech salary and company survey - 2023.csv',
+    2024: 'r_biotech salary and company survey - 2024.csv',
+}
+
+# Older column names -> the 2024 names used throughout the notebook and helpers.
+column_renames = {
+    'Highest achieved Formal Education': 'What degrees do you have? ',
+    'Compensation - Annual Equity': 'Compensation - Annual Equity/Stock Option',
+}
+
+base_salary_column = 'Compensation - Annual Base Salary/Pay'
+
+# Free-text columns that are lowercased and stripped for matching.
+normalized_columns = [
+    'Where is the closest major city or hub?',
+    'Role / Title of current position',
+]
+
+categorical_columns = [
+    'What country do you work in?',
+    'Where are you located?',
+    'Biotech sub industry?',
+    'Company Details - public/private/start-up/ subsidiary of ',
+    'Company Detail - Approximate Company Size',
+    'What degrees do you have? ',
+]
+
+
+@instrument.stage('clean_survey')
+def clean_survey(df, year=None, first_rows=True):
+    """
+    Apply the notebook's cleanup steps to one raw survey frame.
+
+    first_rows: whether df starts at the top of the file; False for every chunk
+        of a chunked read but the first.
+
+    - harmonize column names to the 2024 schema
+    - drop the leading "test" response
+    - fix base salaries reported in thousands (x < 1000 -> x * 1000)
+    - lowercase and strip locations and titles
+    - store low-cardinality text columns as categoricals
+    """
+    df = df.rename(columns=column_renames)
+
+    if first_rows and len(df):
+        first_row = df.iloc[0].astype(str).str.strip().str.lower()
+        if (first_row == 'test').any():
+            df = df.drop(index=df.index[0])
+
+    salary = pd.to_numeric(df[base_salary_column], errors='coerce')
+    df[base_salary_column] = salary.where(salary >= 1000, salary * 1000)
+
+    for column in normalized_columns:
+        df[column] = df[column].astype('string').str.lower().str.strip()
+
+    for column in categorical_columns:
+        if column in df:
+            df[column] = df[column].astype('category')
+
+    if year is not None:
+        df.insert(0, 'Survey Year', year)
+
+    return df.reset_index(drop=True)
+
+
+def cleanup_hash():
+    """SHA-256 of `clean_survey`'s source and the column lists it reads."""
+    settings = [column_renames, base_salary_column, normalized_columns, categorical_columns]
+    digest = hashlib.sha256(inspect.getsource(clean_survey).encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_survey(year_or_path, cache_dir=CACHE_DIR):
+    """
+    Load one cleaned survey, from cache if the source CSV and the cleanup code are unchanged.
+
+    year_or_path: a survey year in `survey_paths`, or a path to a CSV.
+    """
+    if year_or_path in survey_paths:
+        year, path = year_or_path, survey_paths[year_or_path]
+    else:
+        year, path = None, year_or_path
+
+    key = f'{file_hash(path)[:16]}-{cleanup_hash()[:8]}-v{SCHEMA_VERSION}'
+    cache_path = os.path.join(cache_dir, f'survey-{key}.pkl')
+    if os.path.exists(cache_path):
+        return pd.read_pickle(cache_path)
+
+    with instrument.timed('read_csv') as stage:
+        raw = pd.read_csv(path)
+        stage.rows = len(raw)
+    df = clean_survey(raw, year=year)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{cache_path}.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+    return df
+
+
+def compact_frame(df, max_unique_ratio=0.5):
+    """
+    Shrink a survey frame without changing any value.
+
+    - downcast integer columns to the smallest integer type that holds them
+    - downcast float columns, e.g. compensation, to float32 when every value
+      survives the round trip exactly
+    - store text columns with at most `max_unique_ratio` distinct values per
+      answered row as categoricals
+
+    Returns:
+    (DataFrame, DataFrame): the compacted frame, and the dtype and memory in MB
+        of each column before and after, with a 'total' row.
+    """
+    before = df.memory_usage(index=False, deep=True)
+    dtypes = df.dtypes
+    df = df.copy()
+
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_bool_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(values):
+            downcast = 'unsigned' if len(values) and values.min() >= 0 else 'integer'
+            df[column] = pd.to_numeric(values, downcast=downcast)
+        elif pd.api.types.is_float_dtype(values):
+            narrow = values.astype('float32')
+            if narrow.astype(values.dtype).equals(values):
+                df[column] = narrow
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            n_unique = values.nunique()
+            if n_unique and n_unique <= max_unique_ratio * values.count():
+                df[column] = values.astype('category')
+
+    after = df.memory_usage(index=False, deep=True)
+    memory = pd.DataFrame({
+        'dtype before': dtypes.astype(str),
+        'dtype after': df.dtypes.astype(str),
+        'MB before': before / 2**20,
+        'MB after': after / 2**20,
+    })
+    memory.loc['total'] = ['', '', before.sum() / 2**20, after.sum() / 2**20]
+    return df, memory
+
+
+def load_surveys(years=tuple(survey_paths), cache_dir=CACHE_DIR):
+    """
+    Load several survey years as one frame with a 'Survey Year' column.
+
+    Columns missing from a year are NaN. Categorical columns keep a categorical
+    dtype over the union of every year's categories.
+    """
+    frames = [load_survey(year, cache_dir=cache_dir) for year in years]
+    df = pd.concat(frames, ignore_index=True)
+    for column in categorical_columns:
+        if column in df and df[column].dtype != 'category':
+            df[column] = df[column].astype('category')
+    return df
@@ -0,0 +1,218 @@
+"""Opt-in timing and memory report for the stages of the salary analysis.
+
+CSV reading, cleanup, seniority mapping, region resolution, compensation parsing
+and chart construction in `ingest`, `mappings`, `helper` and `stylize_mpl` are
+marked as stages. When profiling is on, every call of a stage records its wall
+time, rows processed and peak memory allocated (via tracemalloc), and a summary
+per stage is printed or written as JSON. When it is off, a stage costs one
+attribute check per call.
+
+Turn it on for a whole run with an environment variable:
+
+    SALARY_PROFILE=1 python benchmarks.py              # print a table at exit
+    SALARY_PROFILE=profile.json jupyter nbconvert ...  # write JSON at exit
+
+or around a block of notebook code:
+
+import instrument
+with instrument.profiling() as report:
+    df = ingest.load_surveys()
+    df = mappings.map_seniority_levels(df)
+print(report.table())
+
+tracemalloc slows allocation-heavy code by up to 2-3x while profiling; pass
+`memory=False`, or set SALARY_PROFILE_MEMORY=0, to record times only.
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ENV_VAR = 'SALARY_PROFILE'
+
+
+class Report:
+    """Per-stage totals: calls, seconds, rows and the largest peak memory of any call."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, seconds, rows, peak):
+        entry = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_mb': None})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['rows'] += rows or 0
+        if peak is not None:
+            entry['peak_mb'] = max(entry['peak_mb'] or 0.0, peak / 2**20)
+
+    def summary(self):
+        """One dict per stage, in order of first call, with rows per second."""
+        rows = []
+        for name, entry in self.stages.items():
+            rate = entry['rows'] / entry['seconds'] if entry['rows'] and entry['seconds'] else None
+            rows.append({'stage': name, **entry, 'rows_per_s': rate})
+        return rows
+
+    def table(self):
+        """The summary as a fixed-width text table."""
+        lines = [f'{"stage":<24}{"calls":>7}{"seconds":>10}{"rows":>12}{"rows/s":>14}{"peak MB":>10}']
+        for row in self.summary():
+            rate = f'{row["rows_per_s"]:,.0f}' if row['rows_per_s'] else '-'
+            peak = f'{row["peak_mb"]:.1f}' if row['peak_mb'] is not None else '-'
+            lines.append(
+                f'{row["stage"]:<24}{row["calls"]:>7}{row["seconds"]:>10.3f}'
+                f'{row["rows"]:>12,}{rate:>14}{peak:>10}')
+        return '\n'.join(lines)
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=1)
+
+
+class _Profiler:
+    """Current profiling state; `report` is None when profiling is off."""
+
+    def __init__(self):
+        self.report = None
+        self.memory = True
+        # running stages, innermost last: [start memory, highest peak seen]
+        self.stack = []
+
+
+_profiler = _Profiler()
+
+
+class _Stage:
+    """A running stage; assign `rows` inside a `timed` block."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if _profiler.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if _profiler.stack:
+                _profiler.stack[-1][1] = max(_profiler.stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            _profiler.stack.append([current, current])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        peak = None
+        if _profiler.memory and tracemalloc.is_tracing() and _profiler.stack:
+            start, seen = _profiler.stack.pop()
+            highest = max(seen, tracemalloc.get_traced_memory()[1])
+            peak = highest - start
+            if _profiler.stack:
+                _profiler.stack[-1][1] = max(_profiler.stack[-1][1], highest)
+            tracemalloc.reset_peak()
+        _profiler.report.add(self.name, seconds, self.rows, peak)
+        return False
+
+
+class _NoStage:
+    """Stands in for _Stage when profiling is off."""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_no_stage = _NoStage()
+
+
+def enabled():
+    return _profiler.report is not None
+
+
+def timed(name):
+    """
+    Context manager timing a block as a stage; set `.rows` on it to report throughput.
+
+    with instrument.timed('read_csv') as stage:
+        df = pd.read_csv(path)
+        stage.rows = len(df)
+    """
+    if _profiler.report is None:
+        return _no_stage
+    return _Stage(name)
+
+
+def stage(name, rows_arg=0):
+    """
+    Decorator recording each call of a function as a stage.
+
+    rows_arg: position of the argument whose len() is the number of rows
+        processed, e.g. 1 for a method taking a Series; None to not count rows.
+        The argument is also found when passed by keyword, e.g. `df=...`.
+    """
+    def decorate(func):
+        parameters = list(inspect.signature(func).parameters)
+        rows_name = parameters[rows_arg] if rows_arg is not None and rows_arg < len(parameters) else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profiler.report is None:
+                return func(*args, **kwargs)
+            rows = None
+            if rows_arg is not None and len(args) > rows_arg:
+                rows = args[rows_arg]
+            elif rows_name in kwargs:
+                rows = kwargs[rows_name]
+            if rows is not None:
+                try:
+                    rows = len(rows)
+                except TypeError:
+                    rows = None
+            with _Stage(name, rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def profiling(memory=True):
+    """Record stages inside the block; yields the Report."""
+    previous = (_profiler.report, _profiler.memory, _profiler.stack)
+    report = Report()
+    _profiler.report, _profiler.memory, _profiler.stack = report, memory, []
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield report
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _profiler.report, _profiler.memory, _profiler.stack = previous
+
+
+def _profile_from_environment():
+    target = os.environ.get(ENV_VAR, '')
+    if target in ('', '0'):
+        return
+    memory = os.environ.get(f'{ENV_VAR}_MEMORY', '1') != '0'
+    session = profiling(memory=memory)
+    report = session.__enter__()
+
+    def finish():
+        session.__exit__(None, None, None)
+        if target.endswith('.json'):
+            report.to_json(target)
+        else:
+            print(report.table())
+
+    atexit.register(finish)
+
+
+_profile_from_environment()
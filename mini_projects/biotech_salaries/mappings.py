@@ -1,53 +1,194 @@
+import hashlib
+import json
+import os
 import re
+from collections import OrderedDict
 
-def map_seniority_levels(df):
+import numpy as np
+import pandas as pd
+
+import instrument
+
+career_levels = [
+    'Lead/Principal/Staff/Director', 'Technician', 'Manager', 'Associate',
+    'Associate Lead/Principal/Director', 'Sr. Scientist', 'Scientist',
+    'Sr. Engineer', 'Engineer', 'Data Scientist or Computational Biologist',
+    'Sr. Data Scientist or Computational Biologist', 'VP or higher', 'Others',
+    'Senior Associate', 'Intern or student'
+]
+
+# Ordered by priority: the first pattern found anywhere in a title wins.
+seniority_patterns = [
+    ('Associate Lead/Principal/Director', r'\b(associate|assoc|assc)\s*(lead|principal|director|dir)\b'),
+    ('Lead/Principal/Staff/Director', r'\b(^lead\b|principal|staff|director|dir|head|advisor|cs[eo]|svp|chief)\b'),
+    ('Sr. Data Scientist or Bioinfomatician', r'\b(sr\.?\s*(data sci[a-z]*|data scientist|bioinformatician|computational biologist)|senior\s+(data sci[a-z]*|data scientist|bioinformatician|computational biologist))\b'),
+    ('Data Scientist or Bioinfomatician', r'\b(data sci[a-z]*|data scientist|bioinformatician|computational biologist)\b'),
+    ('Sr. Scientist', r'\b(sr\.?\s*scientist|senior\s+scientist)\b'),
+    ('Scientist', r'\bscientist\b'),
+    ('Sr. Manager', r'\b(sr\.?\s+\w+\s+manager|sr\.?\s*manager|senior\s+\w+\s+manager|senior\s+manager|manager\s+(iii|iv))\b'),
+    ('Sr. Engineer', r'\b(sr\.?\s*engineer|senior\s+engineer|engineer\s+(iii|iv))\b'),
+    ('Engineer', r'\b(engineer|engineering|r&d engineer)\b'),
+    ('Technician', r'\b(technician|operator|tech|lab\s+operator|lab\s+supervisor)\b'),
+    ('Senior Associate', r'\b(senior\s+associate|sra\s?\d*)\b'),
+    ('Associate', r'\b(jr|junior|associate(?!\s+(lead|director|principal))|lab(?:oratory|ratory)?\s+manager|assoc|assc|entry[- ]level|as\d)\b'),
+    ('VP or higher', r'\b(vp|vice president|ceo|cso|cto|cmo|general counsel|svp|chief)\b'),
+    ('Manager', r'\b(manager|supervisor|project manager|mgr)\b'),
+    ('Intern or student', r'\b(intern|student|phd candidate|post\s+doc|co-op)\b'),
+]
+
+DEFAULT_SENIORITY = 'Others'
+
+# Title -> category tables persist here between notebook runs.
+CACHE_DIR = '.cache'
+
+
+def categorize_title(title, patterns=seniority_patterns):
+    """Reference classifier: try each pattern in order on a single title."""
+    title_clean = title.lower().strip()
+    for category, pattern in patterns:
+        if re.search(pattern, title_clean):
+            return category
+    return DEFAULT_SENIORITY
+
+
+class SeniorityClassifier:
+    """
+    Classify job titles against an ordered list of (category, pattern) pairs.
+
+    The patterns are compiled once, up front. A column is classified by normalizing
+    it with pandas string methods, factorizing it so every distinct title is matched
+    only once, and broadcasting the categories back with a single `take`. The first
+    pattern found anywhere in a title wins, exactly as in `categorize_title`.
+
+    Classified titles are memoized in a title -> category table. When `cache_path`
+    is given, the table is loaded from and saved to that JSON file, tagged with
+    `version`, a hash of the patterns; a file written for a different pattern set
+    is ignored, so editing `seniority_patterns` invalidates it automatically.
+    When `max_titles` is given, the table is a least-recently-used cache holding
+    at most that many titles, for long streams whose distinct titles never stop
+    growing.
+
+    Example usage:
+
+    classifier = SeniorityClassifier(cache_path='.cache/seniority_titles.json')
+    df['Seniority Level'] = classifier.classify(df['Role / Title of current position'])
+    """
+
+    def __init__(self, patterns=seniority_patterns, default=DEFAULT_SENIORITY, cache_path=None,
+                 max_titles=None):
+        self.patterns = list(patterns)
+        self.default = default
+        self.categories = np.array(
+            [category for category, _ in self.patterns] + [default], dtype=object)
+        self._compiled = [re.compile(pattern) for _, pattern in self.patterns]
+
+        self.version = hashlib.sha1(
+            json.dumps([self.patterns, default]).encode()).hexdigest()[:12]
+        self.cache_path = cache_path
+        self.max_titles = max_titles
+        self.table = self._load_table()
+        if max_titles is not None:
+            self.table = OrderedDict(list(self.table.items())[-max_titles:])
+
+    def _load_table(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return {}
+        with open(self.cache_path) as f:
+            cached = json.load(f)
+        if cached.get('version') != self.version:
+            return {}
+        return cached['table']
+
+    def _save_table(self):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # write then rename, so an interrupted run never leaves a truncated cache
+        tmp_path = f'{self.cache_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.version, 'table': self.table}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def classify_index(self, title):
+        """Return the index of the first pattern matching a normalized title."""
+        for i, regex in enumerate(self._compiled):
+            if regex.search(title):
+                return i
+        return len(self._compiled)
+
+    def _lookup(self, title):
+        """Pattern index of a normalized title, through the table; returns (index, new)."""
+        index = self.table.get(title)
+        if index is not None:
+            if self.max_titles is not None:
+                self.table.move_to_end(title)
+            return index, False
+        index = self.table[title] = self.classify_index(title)
+        if self.max_titles is not None and len(self.table) > self.max_titles:
+            self.table.popitem(last=False)
+        return index, True
+
+    def classify_title(self, title):
+        """Classify a single, already normalized title."""
+        return self.categories[self._lookup(title)[0]]
+
+    @instrument.stage('seniority', rows_arg=1)
+    def classify(self, titles):
+        """
+        Classify a Series of raw titles in one vectorized pass.
+
+        Only distinct normalized titles missing from the table are matched against the
+        patterns. Missing titles map to the default category.
+
+        Returns a categorical Series whose categories are the pattern categories in
+        priority order, then the default, whether or not they occur in `titles`.
+        """
+        normalized = titles.astype('string').str.lower().str.strip()
+        codes, uniques = normalized.factorize()
+
+        added = False
+        unique_index = np.empty(len(uniques), dtype=np.intp)
+        for i, title in enumerate(uniques):
+            unique_index[i], new = self._lookup(title)
+            added |= new
+
+        if self.cache_path is not None and added:
+            self._save_table()
+
+        # code -1 marks missing titles; route them to the default slot
+        index = np.append(unique_index, len(self._compiled))[codes]
+
+        levels = pd.Categorical.from_codes(index, categories=self.categories)
+        return pd.Series(levels, index=titles.index, name=titles.name)
+
+
+_classifier = None
+
+
+def get_classifier():
+    """Shared classifier backed by the on-disk title cache, created on first use."""
+    global _classifier
+    if _classifier is None:
+        _classifier = SeniorityClassifier(
+            cache_path=os.path.join(CACHE_DIR, 'seniority_titles.json'))
+    return _classifier
+
+
+def map_seniority_levels(df, debug_path=None):
     """
     Map seniority levels based on job titles in the DataFrame.
-    
+
     Parameters:
     df (DataFrame): DataFrame containing a column 'Role / Title of current position'.
-    
+    debug_path (str, optional): If given, write the titles and their levels to this CSV
+        for inspection, e.g. 'temp.csv'.
+
     Returns:
-    DataFrame: Updated DataFrame with a new column 'Seniority Level'.
+    DataFrame: Updated DataFrame with a new categorical column 'Seniority Level'.
     """
+    df['Seniority Level'] = get_classifier().classify(df['Role / Title of current position'])
+
+    if debug_path is not None:
+        df[['Role / Title of current position','Seniority Level']].to_csv(debug_path,index=False)
 
-    career_levels = [
-        'Lead/Principal/Staff/Director', 'Technician', 'Manager', 'Associate',
-        'Associate Lead/Principal/Director', 'Sr. Scientist', 'Scientist',
-        'Sr. Engineer', 'Engineer', 'Data Scientist or Computational Biologist',
-        'Sr. Data Scientist or Computational Biologist', 'VP or higher', 'Others',
-        'Senior Associate', 'Intern or student'
-    ]
-
-    patterns = [
-        ('Associate Lead/Principal/Director', r'\b(associate|assoc|assc)\s*(lead|principal|director|dir)\b'),
-        ('Lead/Principal/Staff/Director', r'\b(^lead\b|principal|staff|director|dir|head|advisor|cs[eo]|svp|chief)\b'),
-        ('Sr. Data Scientist or Bioinfomatician', r'\b(sr\.?\s*(data sci[a-z]*|data scientist|bioinformatician|computational biologist)|senior\s+(data sci[a-z]*|data scientist|bioinformatician|computational biologist))\b'),
-        ('Data Scientist or Bioinfomatician', r'\b(data sci[a-z]*|data scientist|bioinformatician|computational biologist)\b'),
-        ('Sr. Scientist', r'\b(sr\.?\s*scientist|senior\s+scientist)\b'),
-        ('Scientist', r'\bscientist\b'),
-        ('Sr. Manager', r'\b(sr\.?\s+\w+\s+manager|sr\.?\s*manager|senior\s+\w+\s+manager|senior\s+manager|manager\s+(iii|iv))\b'),
-        ('Sr. Engineer', r'\b(sr\.?\s*engineer|senior\s+engineer|engineer\s+(iii|iv))\b'),
-        ('Engineer', r'\b(engineer|engineering|r&d engineer)\b'),
-        ('Technician', r'\b(technician|operator|tech|lab\s+operator|lab\s+supervisor)\b'),
-        ('Senior Associate', r'\b(senior\s+associate|sra\s?\d*)\b'),
-        ('Associate', r'\b(jr|junior|associate(?!\s+(lead|director|principal))|lab(?:oratory|ratory)?\s+manager|assoc|assc|entry[- ]level|as\d)\b'),
-        ('VP or higher', r'\b(vp|vice president|ceo|cso|cto|cmo|general counsel|svp|chief)\b'),
-        ('Manager', r'\b(manager|supervisor|project manager|mgr)\b'),
-        ('Intern or student', r'\b(intern|student|phd candidate|post\s+doc|co-op)\b'),
-    ]
-
-
-    def categorize(title):
-        title_clean = title.lower().strip()
-        for category, pattern in patterns:
-            if re.search(pattern, title_clean):
-                return category
-        return 'Others'
-
-    df['Seniority Level'] = df['Role / Title of current position'].apply(categorize)
-
-    # saveoutput for debugging
-    df[['Role / Title of current position','Seniority Level']].to_csv('temp.csv',index=False)
-    
-    return df
\ No newline at end of file
+    return df
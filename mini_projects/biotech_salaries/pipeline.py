@@ -0,0 +1,258 @@
+"""The salary analysis as a DAG of named, disk-memoized stages.
+
+A stage is a function whose parameters name the stages it reads, like pytest
+fixtures. Its output is pickled under `.cache/pipeline/`, keyed by a hash of
+
+- the stage function's source,
+- the source or value of everything listed in `uses`, e.g. the classes it calls
+  or `helper.economic_region_mapping`, looked up by dotted name on every run so
+  that edits picked up by the notebook's autoreload count,
+- the contents of the files listed in `files`,
+- the content hash of each input stage's output.
+
+Keys are computed from the bottom of the DAG up without loading any cached
+output, and a stage runs only when its key has no cached output. Since inputs
+are keyed by output content, an edit that leaves a stage's result unchanged
+stops there. Editing `economic_region_mapping` reruns 'regions' and the stages
+downstream of it, while 'surveys', 'seniority' and 'compensation' stay cached.
+
+Example usage:
+
+import pipeline
+df = pipeline.analysis.run('classified')
+medians = pipeline.analysis.run('medians')
+pipeline.analysis.status   # stage -> 'ran', 'loaded', 'in memory' or 'cached'
+"""
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import pickle
+
+import pandas as pd
+
+import hashing
+import helper
+import ingest
+import instrument
+import mappings
+
+CACHE_DIR = os.path.join('.cache', 'pipeline')
+
+
+def value_hash(value):
+    """Content hash of a stage output."""
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    if isinstance(value, pd.DataFrame):
+        return hashing.frame_hash(value)
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return hashlib.sha256(pickle.dumps(value)).hexdigest()
+
+
+def describe(name):
+    """Source of a function or class, or repr of a value, given its dotted name."""
+    module, _, attribute = name.rpartition('.')
+    obj = getattr(importlib.import_module(module), attribute)
+    if inspect.isfunction(obj) or inspect.isclass(obj):
+        return inspect.getsource(obj)
+    return json.dumps(obj, sort_keys=True, default=repr)
+
+
+class Stage:
+    def __init__(self, func, uses=(), files=()):
+        self.func = func
+        self.name = func.__name__
+        self.inputs = list(inspect.signature(func).parameters)
+        self.uses = list(uses)
+        self.files = files
+
+    def code_hash(self):
+        digest = hashlib.sha256(inspect.getsource(self.func).encode())
+        for name in self.uses:
+            digest.update(f'\0{name}\0{describe(name)}'.encode())
+        files = self.files() if callable(self.files) else self.files
+        for path in files:
+            digest.update(f'\0{path}\0{hashing.file_hash(path)}'.encode())
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Named stages, each cached on disk by the hash of its code and inputs.
+
+    status: after `run`, how each stage it needed was obtained: 'ran', 'loaded'
+        from disk, 'in memory' from an earlier run, or 'cached' when only its
+        output hash was needed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stages = {}
+        self.status = {}
+        # stage name -> (key, output) of its latest result
+        self._memory = {}
+        self._index = None
+
+    def stage(self, uses=(), files=()):
+        """
+        Register a function as a stage named after it.
+
+        uses: dotted names of the functions, classes and values it depends on.
+        files: paths whose contents it reads, or a function returning them.
+        """
+        def register(func):
+            self.stages[func.__name__] = Stage(func, uses, files)
+            return func
+        return register
+
+    @property
+    def index_path(self):
+        return os.path.join(self.cache_dir, 'index.json')
+
+    def index(self):
+        """'<stage>-<key>' -> hash of that stage's cached output."""
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    self._index = json.load(f)
+        return self._index
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, f'{name}-{key[:16]}.pkl')
+
+    def _key(self, name, keys):
+        if name not in keys:
+            stage = self.stages[name]
+            digest = hashlib.sha256(f'{name}\0{stage.code_hash()}'.encode())
+            for input_name in stage.inputs:
+                digest.update(f'\0{input_name}\0{self._output_hash(input_name, keys)}'.encode())
+            keys[name] = digest.hexdigest()
+        return keys[name]
+
+    def _output_hash(self, name, keys):
+        """Hash of a stage's output for its current key, running the stage if it is not cached."""
+        key = self._key(name, keys)
+        entry = f'{name}-{key[:16]}'
+        if entry not in self.index() or not os.path.exists(self._path(name, key)):
+            self._compute(name, key, keys)
+        else:
+            self.status.setdefault(name, 'cached')
+        return self.index()[entry]
+
+    def _compute(self, name, key, keys):
+        stage = self.stages[name]
+        args = [self._load(input_name, keys) for input_name in stage.inputs]
+        with instrument.timed(f'stage {name}'):
+            value = stage.func(*args)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(name, key)
+        tmp_path = f'{path}.tmp'
+        pd.to_pickle(value, tmp_path)
+        os.replace(tmp_path, path)
+        self.index()[f'{name}-{key[:16]}'] = value_hash(value)
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index(), f, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+        self._memory[name] = (key, value)
+        self.status[name] = 'ran'
+        return value
+
+    def _load(self, name, keys):
+        key = self._key(name, keys)
+        cached = self._memory.get(name)
+        if cached is not None and cached[0] == key:
+            if self.status.get(name, 'cached') == 'cached':
+                self.status[name] = 'in memory'
+            return cached[1]
+        self._output_hash(name, keys)
+        if self.status.get(name) == 'ran':
+            return self._memory[name][1]
+        value = pd.read_pickle(self._path(name, key))
+        self._memory[name] = (key, value)
+        self.status[name] = 'loaded'
+        return value
+
+    def run(self, name):
+        """The output of a stage, running only what changed since it was cached."""
+        self.status = {}
+        return self._load(name, {})
+
+    def clear(self):
+        """Delete every cached output."""
+        self._memory = {}
+        self._index = {}
+        if os.path.isdir(self.cache_dir):
+            for file in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, file))
+
+
+analysis = Pipeline()
+
+size_column = 'Company Detail - Approximate Company Size'
+company_sizes = ['1-50', '50-200', '200-1000', '1000-5000', '5000+']
+
+
+@analysis.stage(
+    uses=['ingest.load_surveys', 'ingest.load_survey', 'ingest.clean_survey', 'ingest.cleanup_hash',
+          'ingest.survey_paths', 'ingest.SCHEMA_VERSION', 'ingest.column_renames', 'ingest.base_salary_column',
+          'ingest.normalized_columns', 'ingest.categorical_columns'],
+    files=lambda: list(ingest.survey_paths.values()))
+def surveys():
+    return ingest.load_surveys()
+
+
+@analysis.stage(uses=['mappings.SeniorityClassifier', 'mappings.seniority_patterns', 'mappings.DEFAULT_SENIORITY'])
+def seniority(surveys):
+    return mappings.SeniorityClassifier().classify(surveys['Role / Title of current position'])
+
+
+@analysis.stage(uses=['helper.RegionResolver', 'helper._AhoCorasick', 'helper._as_literal',
+                      'helper.economic_region_mapping'])
+def regions(surveys):
+    resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+    return resolver.resolve(surveys['Where is the closest major city or hub?'])['Economic Region']
+
+
+@analysis.stage(uses=['helper.parse_compensation', 'helper.parse_amounts'])
+def compensation(surveys):
+    comp, _ = helper.parse_compensation(surveys)
+    return comp
+
+
+@analysis.stage()
+def classified(surveys, seniority, regions, compensation):
+    df = surveys.copy()
+    df['Seniority Level'] = seniority
+    df['Economic Region'] = regions
+    df[compensation.columns] = compensation
+    return df
+
+
+@analysis.stage()
+def medians(classified):
+    """Median total compensation by seniority level and company size, in long format."""
+    grouped = classified.groupby(['Seniority Level', size_column], observed=True)
+    return grouped['Total Annual Compensation'].median().reset_index()
+
+
+@analysis.stage(uses=['helper.make_multi_dumbbell', 'helper.colors'])
+def chart(medians):
+    """PNG bytes of the medians as a dumbbell chart per seniority level."""
+    import matplotlib.pyplot as plt
+
+    y_order = list(medians['Seniority Level'].cat.remove_unused_categories().cat.categories)
+    f, _ = helper.make_multi_dumbbell(
+        medians, x_column='Total Annual Compensation', y_column='Seniority Level',
+        group_column=size_column, groups=company_sizes, colors=helper.colors, y_order=y_order)
+    buffer = io.BytesIO()
+    f.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    plt.close(f)
+    return buffer.getvalue()
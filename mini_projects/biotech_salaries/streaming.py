@@ -0,0 +1,179 @@
+"""Bounded-memory processing of survey dumps too large to load at once.
+
+CSV files are read in chunks. Each chunk goes through the same cleanup,
+seniority classification and region resolution as `ingest`, `mappings` and
+`helper`, and its salaries are folded into per-group quantile sketches.
+Memory depends on the number of groups and sketch buckets, not on file size.
+
+Example usage:
+
+import streaming
+summary = streaming.stream_quantiles(
+    ['huge dump.csv'],
+    group_columns=['Seniority Level', 'Economic Region'],
+    value_column='Total Annual Compensation',
+)
+f, ax = helper.make_multi_dumbbell(
+    summary, x_column='median', y_column='Seniority Level',
+    group_column='Economic Region', ...)
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import helper
+import ingest
+import instrument
+import mappings
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative error guarantee.
+
+    Positive values are counted in logarithmic buckets: bucket i holds values in
+    (gamma**(i-1), gamma**i], with gamma = (1 + alpha) / (1 - alpha). A quantile q
+    is reported as the midpoint of the bucket holding v, the value of 0-based rank
+    floor(q * (n - 1)) in sorted order, and satisfies |e - v| <= alpha * v. v is not
+    interpolated, so for an even count the median estimates the lower of the two
+    middle values, not their mean as `Series.median` returns.
+    Zero and negative values, which do not occur in salaries, are counted
+    separately and reported as 0.
+
+    Sketches with the same `alpha` merge exactly by adding bucket counts, so chunks
+    or files can be sketched independently and combined afterwards. With the
+    default alpha = 0.5%, values between $1 and $100M need about 1,850 buckets.
+    """
+
+    def __init__(self, alpha=0.005):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    def _add_buckets(self, index, counts):
+        """Add counts to absolute bucket indices, growing the dense array as needed."""
+        if len(index) == 0:
+            return
+        low, high = int(index.min()), int(index.max())
+        if len(self.counts) == 0:
+            self.offset = low
+        new_offset = min(self.offset, low)
+        new_length = max(self.offset + len(self.counts), high + 1) - new_offset
+        if new_offset != self.offset or new_length != len(self.counts):
+            grown = np.zeros(new_length, dtype=np.int64)
+            start = self.offset - new_offset
+            grown[start:start + len(self.counts)] = self.counts
+            self.counts, self.offset = grown, new_offset
+        np.add.at(self.counts, index - self.offset, counts)
+
+    def update(self, values):
+        """Add an array of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        index = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        buckets, counts = np.unique(index, return_counts=True)
+        self._add_buckets(buckets, counts)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch with the same alpha into this one."""
+        if other.alpha != self.alpha:
+            raise ValueError('cannot merge sketches with different alpha')
+        nonzero = np.flatnonzero(other.counts)
+        self._add_buckets(nonzero + other.offset, other.counts[nonzero])
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        """Estimate the q-th quantile (0 <= q <= 1); NaN for an empty sketch."""
+        total = self.count
+        if total == 0:
+            return np.nan
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts) + self.zero_count
+        bucket = int(np.searchsorted(cumulative, rank, side='right')) + self.offset
+        # midpoint of the bucket in the relative sense: 2 * gamma**i / (gamma + 1)
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+
+def classify_chunk(chunk, year=None, resolver=None, classifier=None, first=True):
+    """
+    Clean one raw chunk and add 'Seniority Level' and 'Economic Region'.
+
+    classifier: a `mappings.SeniorityClassifier`; defaults to a fresh one, so a
+        stream's titles are never written to the shared on-disk title cache.
+    first: whether this is a file's first chunk, the only one that can hold the
+        leading "test" response.
+    """
+    chunk = ingest.clean_survey(chunk, year=year, first_rows=first)
+    if classifier is None:
+        classifier = mappings.SeniorityClassifier()
+    chunk['Seniority Level'] = classifier.classify(chunk['Role / Title of current position'])
+    if resolver is None:
+        resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+    chunk['Economic Region'] = resolver.resolve(
+        chunk['Where is the closest major city or hub?'])['Economic Region']
+    comp, _ = helper.parse_compensation(chunk)
+    chunk[comp.columns] = comp
+    return chunk
+
+
+def stream_quantiles(
+    paths,
+    group_columns,
+    value_column='Annual Base Salary',
+    quantiles={'p25': 0.25, 'median': 0.5, 'p75': 0.75},
+    chunksize=100_000,
+    alpha=0.005,
+    max_titles=100_000):
+    """
+    Stream CSV files in chunks and summarize value_column per group.
+
+    Returns a DataFrame with the group columns, 'count' and one column per entry in
+    `quantiles`, in the long format that `make_dumbbell` and `make_multi_dumbbell`
+    consume. Every quantile is within a relative error `alpha` of the exact value.
+
+    Titles are classified through a classifier private to this call, memoizing at
+    most `max_titles` distinct titles in memory and nothing on disk.
+    """
+    resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+    classifier = mappings.SeniorityClassifier(max_titles=max_titles)
+    sketches = {}
+
+    for path in paths:
+        chunks = pd.read_csv(path, chunksize=chunksize)
+        first = True
+        while True:
+            with instrument.timed('read_csv') as stage:
+                chunk = next(chunks, None)
+                stage.rows = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            chunk = classify_chunk(chunk, resolver=resolver, classifier=classifier, first=first)
+            first = False
+            for key, values in chunk.groupby(group_columns, observed=True)[value_column]:
+                if key not in sketches:
+                    sketches[key] = QuantileSketch(alpha)
+                sketches[key].update(values.to_numpy())
+
+    rows = []
+    for key, sketch in sketches.items():
+        row = dict(zip(group_columns, key))
+        row['count'] = sketch.count
+        for name, q in quantiles.items():
+            row[name] = sketch.quantile(q)
+        rows.append(row)
+    columns = list(group_columns) + ['count'] + list(quantiles)
+    return pd.DataFrame(rows, columns=columns)
@@ -2,10 +2,19 @@
 and the Economist style guide https://design-system.economist.com/documents/CHARTstyleguide_20170505.pdf
 
 Figure size are in inches (default)
+
+pyplot is imported on first use, and functions that take `fig=None` draw on the
+figure that is current when they are called.
 """
-import matplotlib.pyplot as plt
 import math
 
+import instrument
+
+
+def _current_figure(fig):
+    import matplotlib.pyplot as plt
+    return plt.gcf() if fig is None else fig
+
 def color_palette(style='economist'):
     # Note that color orders depend on the chart type
     # work in progress
@@ -33,6 +42,7 @@ def color_palette(style='economist'):
         
     return colors
 
+@instrument.stage('add_titles', rows_arg=None)
 def add_titles(
     fig, 
     title_label=None, 
@@ -101,7 +111,7 @@ def title(
     size:float = 15,
     xpos:float = 0,
     ypos:float = 0.9,
-    fig = plt.gcf(),
+    fig = None,
     **kwargs):
     """Main title should describe the key takeaway.
     
@@ -111,7 +121,7 @@ def title(
 
     
     """
-    
+    fig = _current_figure(fig)
     fig.text(xpos, ypos, s=label, weight=weight, size=size, **kwargs)
     
 def subtitle(
@@ -119,7 +129,7 @@ def subtitle(
     size:float = 10,
     xpos:float = 0,
     ypos:float = 1.01,
-    fig = plt.gcf(), 
+    fig = None,
     **kwargs):
     """Subtitle gives the technical description.
     
@@ -128,7 +138,7 @@ def subtitle(
         "India, bank credit to the commercial sector"
     
     """
-    
+    fig = _current_figure(fig)
     fig.text(xpos, ypos, s=label, size=size, **kwargs)
     
 def subsubtitle(
@@ -136,7 +146,7 @@ def subsubtitle(
     size:float = 9,
     xpos:float = 0,
     ypos:float = 1.0,
-    fig = plt.gcf(), 
+    fig = None,
     **kwargs):
     """Continuation of the subtitle, usually units and date information.
     
@@ -144,7 +154,7 @@ def subsubtitle(
     
     e.g., % increase on a year earlier
     """
-    
+    fig = _current_figure(fig)
     fig.text(xpos, ypos, s=label, size=size, **kwargs)
 
 
@@ -158,6 +168,8 @@ def add_economist_rectangle(fig, ax, xpos=0.1, ypos=1.04, width=0.05, height=0.0
     economist color scheme: http://pattern-library.economist.com/color.html
     """
 
+    import matplotlib.pyplot as plt
+
     economist_red = '#e3120b'
 
     fig.patches.extend([plt.Rectangle(
@@ -175,7 +187,7 @@ def datasource(
     fontsize=10, 
     weight='light', 
     alpha=0.8,
-    fig=plt.gcf(),
+    fig=None,
     **kwargs
     ):
     """
@@ -196,11 +208,14 @@ def datasource(
     -------
 
     """
+    fig = _current_figure(fig)
     fig.text(
         xpos, ypos, s=label, fontsize=fontsize, alpha=alpha, weight=weight, **kwargs
         )
 
 def display_examples():
+    import matplotlib.pyplot as plt
+
     # Ensure a figure size that allows for the title to be visible
     plt.figure(figsize=(10, 6))  # Example figure size, adjust as needed
 
@@ -0,0 +1,138 @@
+"""Synthetic salary survey responses at any scale, for benchmarks and load tests.
+
+Each column is sampled from its empirical distribution in the 2022-2024 survey
+CSVs, so the mix of titles, hubs, company sizes, degrees and free-text bonus and
+equity formats matches the real responses. To keep the text columns from
+collapsing to a few thousand distinct values at scale, a share of titles get a
+level or specialty suffix, and a share of hubs are keywords from
+`economic_region_mapping` and `geographical_mapping` in varied capitalization.
+Base salaries are real ones with a few percent of noise.
+
+The frames use the raw 2024 column names, so they go through the same
+`ingest.clean_survey`, `mappings`, `helper` and `streaming` code as the CSVs.
+
+Example usage:
+
+import synthetic
+df = synthetic.generate_survey(1_000_000)
+for chunk in synthetic.iter_survey(10_000_000, chunksize=1_000_000):
+    ...
+"""
+import numpy as np
+import pandas as pd
+
+import helper
+import ingest
+
+# Raw columns the analysis reads, with the 2024 names, in the 2024 order.
+raw_columns = [
+    'What country do you work in?',
+    'Where is the closest major city or hub?',
+    'Where are you located?',
+    'Biotech sub industry?',
+    'Company Details - public/private/start-up/ subsidiary of ',
+    'Company Detail - Approximate Company Size',
+    'Role / Title of current position',
+    'What degrees do you have? ',
+    'Years of Experience',
+    'Compensation - Annual Base Salary/Pay',
+    'Compensation - Annual Target Bonus ($)',
+    'Compensation - Annual Equity/Stock Option',
+]
+
+# Sampled from their observed values; base salary is sampled as a number.
+sampled_columns = [c for c in raw_columns if c != ingest.base_salary_column]
+
+title_column = 'Role / Title of current position'
+location_column = 'Where is the closest major city or hub?'
+
+title_suffixes = [
+    ' i', ' ii', ' iii', ' iv', ' 1', ' 2', ', oncology', ', immunology', ' - cell therapy',
+    ' - gene therapy', ', cmc', ', qc', ' (contract)', ' (remote)', ', r&d', ', discovery',
+]
+
+
+class SurveyModel:
+    """
+    Empirical distributions of the survey columns, for sampling synthetic responses.
+
+    novel_titles: share of titles given a random suffix, e.g. 'scientist ii'.
+    novel_locations: share of hubs drawn from the region mapping keywords instead
+        of the observed answers.
+    """
+
+    def __init__(self, paths=tuple(ingest.survey_paths.values()), novel_titles=0.2, novel_locations=0.2):
+        self.novel_titles = novel_titles
+        self.novel_locations = novel_locations
+        raw = pd.concat(
+            [pd.read_csv(path).rename(columns=ingest.column_renames) for path in paths],
+            ignore_index=True)
+
+        self.distributions = {}
+        for column in sampled_columns:
+            counts = raw[column].value_counts(dropna=False) if column in raw else pd.Series({np.nan: 1})
+            self.distributions[column] = (counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy())
+
+        salaries = pd.to_numeric(raw[ingest.base_salary_column], errors='coerce').dropna()
+        self.base_salaries = salaries.to_numpy(dtype=float)
+
+        keywords = {
+            literal
+            for mapping in (helper.economic_region_mapping, helper.geographical_mapping)
+            for region_keywords in mapping.values()
+            for literal in map(helper._as_literal, region_keywords)
+            if literal
+        }
+        self.location_keywords = np.array(sorted(keywords), dtype=object)
+
+    def _choice(self, column, n_rows, rng):
+        values, probabilities = self.distributions[column]
+        return values[rng.choice(len(values), n_rows, p=probabilities)]
+
+    def sample(self, n_rows, seed=0):
+        """A DataFrame of n_rows synthetic raw responses."""
+        rng = np.random.default_rng(seed)
+        df = pd.DataFrame({column: self._choice(column, n_rows, rng) for column in sampled_columns})
+
+        titles = df[title_column].to_numpy(dtype=object)
+        novel = np.flatnonzero((rng.random(n_rows) < self.novel_titles) & pd.notna(titles))
+        suffixes = np.array(title_suffixes, dtype=object)[rng.integers(0, len(title_suffixes), len(novel))]
+        titles[novel] = titles[novel] + suffixes
+        df[title_column] = titles
+
+        locations = df[location_column].to_numpy(dtype=object)
+        novel = np.flatnonzero(rng.random(n_rows) < self.novel_locations)
+        keywords = self.location_keywords[rng.integers(0, len(self.location_keywords), len(novel))]
+        capitalized = rng.random(len(novel)) < 0.5
+        keywords[capitalized] = [keyword.title() for keyword in keywords[capitalized]]
+        locations[novel] = keywords
+        df[location_column] = locations
+
+        # real salaries with +/- 5% noise, rounded to $500; values reported in thousands stay so
+        base = self.base_salaries[rng.integers(0, len(self.base_salaries), n_rows)]
+        noisy = base * rng.normal(1, 0.05, n_rows)
+        df.insert(0, ingest.base_salary_column, np.where(base >= 1000, np.round(noisy / 500) * 500, base))
+        return df[raw_columns]
+
+
+_model = None
+
+
+def get_model():
+    """The SurveyModel of the yearly survey files, created on first use."""
+    global _model
+    if _model is None:
+        _model = SurveyModel()
+    return _model
+
+
+def generate_survey(n_rows, seed=0):
+    """n_rows synthetic raw survey responses, reproducible for a given seed."""
+    return get_model().sample(n_rows, seed=seed)
+
+
+def iter_survey(n_rows, chunksize=1_000_000, seed=0):
+    """Yield n_rows synthetic responses in frames of at most chunksize rows."""
+    model = get_model()
+    for i, start in enumerate(range(0, n_rows, chunksize)):
+        yield model.sample(min(chunksize, n_rows - start), seed=[seed, i])
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+import batch_render
+
+pytest.importorskip('matplotlib')
+
+
+@pytest.fixture
+def specs(tmp_path):
+    kwargs = {'y_column': 'level', 'x_cols': ['base', 'total'], 'colors': ['skyblue', 'orange'],
+              'labels': ['Base', 'Total']}
+    return [
+        {'output': str(tmp_path / 'charts' / f'{name}.png'), 'chart': 'helper.make_dumbbell',
+         'filter': {'region': [region]}, 'kwargs': kwargs, 'savefig': {'dpi': 20}}
+        for name, region in [('east', 'East'), ('west', 'West'), ('south', 'South')]
+    ]
+
+
+def render(df, specs, tmp_path):
+    return batch_render.render_charts(df, specs, max_workers=1, cache_dir=tmp_path / 'cache', theme=False)
+
+
+def test_render_skips_up_to_date_charts(specs, tmp_path):
+    df = pd.DataFrame({
+        'region': ['East', 'East', 'West', 'West', 'South'],
+        'level': ['Scientist', 'Director', 'Scientist', 'Director', 'Scientist'],
+        'base': [120e3, 200e3, 140e3, 230e3, 110e3],
+        'total': [140e3, 260e3, 170e3, 300e3, 125e3],
+    })
+    outputs = [spec['output'] for spec in specs]
+
+    assert sorted(render(df, specs, tmp_path)) == sorted(outputs)
+    mtimes = {output: os.stat(output).st_mtime_ns for output in outputs}
+    assert list((tmp_path / 'cache').glob('*.pkl')) == []
+
+    assert render(df, specs, tmp_path) == []
+
+    specs[1]['savefig'] = {'dpi': 30}
+    assert render(df, specs, tmp_path) == [specs[1]['output']]
+    for output in outputs:
+        changed = os.stat(output).st_mtime_ns != mtimes[output]
+        assert changed == (output == specs[1]['output'])
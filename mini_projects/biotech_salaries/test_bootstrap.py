@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bootstrap
+
+
+@pytest.fixture
+def grouped():
+    rng = np.random.default_rng(1)
+    codes = rng.integers(0, 12, 3000)
+    codes[codes == 5] = 4  # an empty group
+    return rng.lognormal(11, 0.5, 3000), codes
+
+
+@pytest.mark.parametrize('max_bytes', [1, 1_000, 50_000, 1_000_000])
+def test_result_does_not_depend_on_max_bytes(grouped, max_bytes):
+    values, codes = grouped
+    expected = bootstrap.resample_medians(values, codes, 12, n_resamples=150)
+    medians = bootstrap.resample_medians(values, codes, 12, n_resamples=150, max_bytes=max_bytes)
+    np.testing.assert_array_equal(medians, expected)
+    assert np.isnan(medians[5]).all()
+
+
+def test_same_seed_same_result(grouped):
+    values, codes = grouped
+    first = bootstrap.resample_medians(values, codes, 12, n_resamples=100, seed=3)
+    np.testing.assert_array_equal(bootstrap.resample_medians(values, codes, 12, n_resamples=100, seed=3), first)
+    assert not np.array_equal(bootstrap.resample_medians(values, codes, 12, n_resamples=100, seed=4), first,
+                              equal_nan=True)
+
+
+def test_interval_brackets_sample_median(grouped):
+    values, codes = grouped
+    df = pd.DataFrame({'group': codes, 'value': values})
+    result = bootstrap.bootstrap_medians(df, 'value', ['group'], n_resamples=500, max_bytes=10_000)
+    assert len(result) == 11
+    assert (result['ci_low'] <= result['median']).all()
+    assert (result['median'] <= result['ci_high']).all()
+    assert (result['ci_low'] < result['ci_high']).all()
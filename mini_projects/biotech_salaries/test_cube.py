@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+
+
+def survey(n_rows, seed, levels=3):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        d: rng.choice([f'{d[:4]} {i}' for i in range(levels)] + [None], n_rows)
+        for d in cube.dimensions
+    })
+    for m in cube.measures:
+        df[m] = rng.choice([0.0, np.nan, *rng.integers(50, 200, 20) * 1000.0], n_rows)
+    return df
+
+
+def assert_same_tables(expected, actual):
+    assert expected.tables.keys() == actual.tables.keys()
+    for dims, table in expected.tables.items():
+        pd.testing.assert_frame_equal(actual.tables[dims].reindex(table.index), table, check_dtype=False)
+
+
+@pytest.mark.parametrize('zero_is_missing', [False, True])
+def test_append_matches_rebuild(zero_is_missing):
+    old, new = survey(500, 0), survey(40, 1, levels=5)
+    grown = cube.SalaryCube(old, zero_is_missing=zero_is_missing)
+    assert grown.append(new) > 0
+    rebuilt = cube.SalaryCube(pd.concat([old, new], ignore_index=True), zero_is_missing=zero_is_missing)
+    assert_same_tables(rebuilt, grown)
+
+
+def test_append_nothing():
+    df = survey(200, 0)
+    salary_cube = cube.SalaryCube(df)
+    assert salary_cube.append(df.iloc[:0]) == 0
+    assert_same_tables(cube.SalaryCube(df), salary_cube)
+
+
+def test_matches_groupby():
+    df = survey(500, 2)
+    dims = ['Seniority Level', 'Economic Region']
+    medians = cube.SalaryCube(df).slice(dims).set_index(dims)['median']
+    expected = df.groupby(dims)['Annual Base Salary'].median()
+    pd.testing.assert_series_equal(medians.reindex(expected.index), expected, check_names=False)
+
+
+@pytest.mark.parametrize('pending_limit', [0, 10**9])
+def test_repeated_appends_match_rebuild(monkeypatch, pending_limit):
+    # a limit of 0 merges pending values on every append, 10**9 never does
+    monkeypatch.setattr(cube.SalaryCube, '_pending_limit', lambda self, n_sorted: pending_limit)
+    parts = [survey(300, 0), survey(30, 1), survey(30, 2, levels=5), survey(1, 3)]
+    grown = cube.SalaryCube(parts[0])
+    for part in parts[1:]:
+        grown.append(part)
+    assert_same_tables(cube.SalaryCube(pd.concat(parts, ignore_index=True)), grown)
+
+
+def test_append_leaves_untouched_cells_alone():
+    df = survey(300, 0)
+    salary_cube = cube.SalaryCube(df)
+    dims = ('Seniority Level',)
+    before = salary_cube.tables[dims].copy()
+    new = df.iloc[:5].assign(**{'Seniority Level': 'Seni 0'})
+    assert salary_cube.append(new) > 0
+    after = salary_cube.tables[dims]
+    pd.testing.assert_frame_equal(after.drop('Seni 0'), before.drop('Seni 0'))
+    counts = ('Annual Base Salary', 'count')
+    assert after.loc['Seni 0', counts] > before.loc['Seni 0', counts]
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmarks
+import helper
+import ingest
+
+here = Path(__file__).parent
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('$15k', 15000),
+    ('200k', 200000),
+    ('100k', 100000),
+    ('150k', 150000),
+    ('$40K', 40000),
+    ('8.5k', 8500),
+    ('10-15k', 15000),
+    ('10% of salary', 10000),
+    ('15.25% usually', 15250),
+    ('17.5', 17500),
+    ('18,750', 18750),
+    ('depends, 10-15%', 15000),
+    ('10,000 in RSU', 10000),
+    ('Not Applicable/None', 0),
+])
+def test_parse_amounts(value, expected):
+    amounts, unparsed = helper.parse_amounts(pd.Series([value]), pd.Series([100000.0]))
+    assert amounts[0] == pytest.approx(expected)
+    assert not unparsed[0]
+    assert helper.convert_to_float(value, 100000.0) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value', ['Idk', 'IDK … 10s of thousands', 'Stock options', np.nan])
+def test_parse_amounts_unparsed(value):
+    amounts, unparsed = helper.parse_amounts(pd.Series([value], dtype=object), pd.Series([100000.0]))
+    assert amounts[0] == 0
+    assert unparsed[0]
+
+
+def test_region_resolver_matches_notebook_loop():
+    column = 'Where is the closest major city or hub?'
+    locations = pd.concat(
+        [pd.read_csv(here / path, usecols=[column])[column] for path in ingest.survey_paths.values()], ignore_index=True)
+    resolver = helper.RegionResolver({'Economic Region': helper.economic_region_mapping})
+    resolved = resolver.resolve(locations)['Economic Region'].astype(object)
+    expected = benchmarks.region_loop(locations, helper.economic_region_mapping)
+    assert resolved.fillna('').equals(expected.fillna(''))
+
+
+def test_region_resolver_priority():
+    mapping = {
+        'Boston': ['boston'],
+        'Cambridge': ['cambridge,? ma', r'\bma\b'],
+        'Massachusetts': ['boston', 'massachusetts'],
+    }
+    locations = pd.Series(['boston', 'cambridge ma', 'boston, ma', 'Boston Massachusetts', 'denver', None])
+
+    # overlapping keywords: the region listed last wins, as in the notebook loop
+    last_wins = helper.RegionResolver({'region': mapping}).resolve(locations)['region']
+    assert list(last_wins.astype(object).fillna('')) == [
+        'Massachusetts', 'Cambridge', 'Massachusetts', 'Massachusetts', '', '']
+
+    priority = {'region': ['Cambridge', 'Boston', 'Massachusetts']}
+    explicit = helper.RegionResolver({'region': mapping}, priority).resolve(locations)['region']
+    assert list(explicit.astype(object).fillna('')) == [
+        'Boston', 'Cambridge', 'Cambridge', 'Boston', '', '']
+
+
+def test_dumbbells_match_references():
+    groups = ['median', '1-50', '50-200']
+    df, levels = benchmarks.dumbbell_frame(6, groups)
+    kwargs = dict(x_column='salary', y_column='level', group_column='group', groups=groups,
+                  colors=helper.colors, y_order=levels, marker=['|', 'o', 'o'])
+    assert (benchmarks.render(helper.make_multi_dumbbell, df, **kwargs)
+            == benchmarks.render(benchmarks.reference_multi_dumbbell, df, **kwargs)).all()
+
+    wide = pd.DataFrame({'level': ['a', 'b', 'c'], 'x1': [1.0, 5, 3], 'x2': [2.0, 4, 8]})
+    kwargs = dict(y_column='level', x_cols=['x1', 'x2'], colors=['skyblue', 'orange'], labels=['Base', 'Total'])
+    assert (benchmarks.render(helper.make_dumbbell, wide, **kwargs)
+            == benchmarks.render(benchmarks.reference_dumbbell, wide, **kwargs)).all()
+
+
+def test_strip_chart_keeps_row_extremes_when_sampling():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'salary': rng.normal(100_000, 20_000, 5_000),
+        'level': rng.choice(['a', 'b', 'c', 'other'], 5_000),
+        'Role / Title of current position': 'title',
+    })
+    full = helper.make_strip_chart(df, 'salary', 'level', ['a', 'b', 'c'])
+    assert len(full.data) == 1 and len(full.data[0].x) == df['level'].isin(['a', 'b', 'c']).sum()
+
+    sampled = helper.make_strip_chart(df, 'salary', 'level', ['a', 'b', 'c'], max_points=300).data[0]
+    assert len(sampled.x) < 400
+    for code, level in enumerate(['a', 'b', 'c']):
+        x = np.asarray(sampled.x)[np.asarray(sampled.y) == code]
+        assert x.min() == df.loc[df['level'] == level, 'salary'].min()
+        assert x.max() == df.loc[df['level'] == level, 'salary'].max()
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pandas as pd
+
+import ingest
+import mappings
+
+here = Path(__file__).parent
+
+title_column = 'Role / Title of current position'
+
+
+def test_classify_matches_categorize_title():
+    titles = pd.concat(
+        [pd.read_csv(here / path, usecols=[title_column])[title_column] for path in ingest.survey_paths.values()],
+        ignore_index=True).dropna()
+    levels = mappings.SeniorityClassifier().classify(titles)
+    assert list(levels) == list(titles.map(mappings.categorize_title))
+
+
+def test_classify_missing_and_unmatched_titles():
+    titles = pd.Series(['  Senior Scientist ', None, 'astronaut'])
+    levels = mappings.SeniorityClassifier().classify(titles)
+    assert list(levels) == ['Sr. Scientist', mappings.DEFAULT_SENIORITY, mappings.DEFAULT_SENIORITY]
+    assert list(levels.cat.categories)[-1] == mappings.DEFAULT_SENIORITY
+
+
+def test_title_cache_ignores_other_patterns(tmp_path):
+    cache_path = tmp_path / 'titles.json'
+    classifier = mappings.SeniorityClassifier(cache_path=cache_path)
+    classifier.classify(pd.Series(['scientist']))
+    expected = {'scientist': classifier.classify_index('scientist')}
+    assert mappings.SeniorityClassifier(cache_path=cache_path).table == expected
+    other = [('Scientist', r'\bscientist\b')]
+    assert mappings.SeniorityClassifier(other, cache_path=cache_path).table == {}
+
+
+def test_bounded_table_evicts_least_recently_used():
+    classifier = mappings.SeniorityClassifier(max_titles=2)
+    classifier.classify(pd.Series(['scientist', 'engineer']))
+    classifier.classify(pd.Series(['scientist', 'intern']))
+    assert list(classifier.table) == ['scientist', 'intern']
+    levels = classifier.classify(pd.Series(['engineer', 'Scientist', 'intern', 'engineer']))
+    assert list(levels) == ['Engineer', 'Scientist', 'Intern or student', 'Engineer']
+    assert len(classifier.table) == 2
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ingest
+import mappings
+import streaming
+
+here = Path(__file__).parent
+
+
+def test_chunked_counts_match_one_chunk():
+    paths = [here / ingest.survey_paths[2024]]
+    whole = streaming.stream_quantiles(paths, ['Seniority Level'], chunksize=1_000_000)
+    chunked = streaming.stream_quantiles(paths, ['Seniority Level'], chunksize=100)
+    assert chunked['count'].sum() == whole['count'].sum()
+    assert np.allclose(chunked.sort_values('Seniority Level')['median'],
+                       whole.sort_values('Seniority Level')['median'])
+
+
+def test_only_first_chunk_drops_test_row():
+    chunk = pd.read_csv(here / ingest.survey_paths[2024], nrows=3)
+    chunk.iloc[0, 1] = 'Test'
+    assert len(ingest.clean_survey(chunk)) == 2
+    assert len(ingest.clean_survey(chunk, first_rows=False)) == 3
+
+
+def test_sketch_reports_floor_rank_order_statistic():
+    values = np.random.default_rng(0).lognormal(11, 0.5, 1000)
+    sketch = streaming.QuantileSketch().update(values)
+    ordered = np.sort(values)
+    for q in [0.0, 0.25, 0.5, 0.75, 1.0]:
+        exact = ordered[int(np.floor(q * (len(values) - 1)))]
+        assert abs(sketch.quantile(q) - exact) <= sketch.alpha * exact
+    # an even count: the lower middle value, not the mean of the two
+    assert abs(streaming.QuantileSketch().update([100.0, 200.0]).quantile(0.5) - 100) <= 0.5
+
+
+def test_stream_keeps_titles_bounded_and_off_disk(monkeypatch):
+    def save_table(self):
+        raise AssertionError('stream wrote the title cache')
+
+    monkeypatch.setattr(mappings.SeniorityClassifier, '_save_table', save_table)
+    paths = [here / ingest.survey_paths[2024]]
+    bounded = streaming.stream_quantiles(paths, ['Seniority Level'], chunksize=100, max_titles=5)
+    whole = streaming.stream_quantiles(paths, ['Seniority Level'], chunksize=1_000_000)
+    pd.testing.assert_frame_equal(bounded.sort_values('Seniority Level', ignore_index=True),
+                                  whole.sort_values('Seniority Level', ignore_index=True))